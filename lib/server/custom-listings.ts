@@ -2,7 +2,7 @@ import { promises as fs } from 'node:fs';
 import path from 'node:path';
 import type { ListingRecord } from './listings';
 
-const CUSTOM_LISTINGS_PATH = path.join(process.cwd(), 'data', 'custom-listings.json');
+export const CUSTOM_LISTINGS_PATH = path.join(process.cwd(), 'data', 'custom-listings.json');
 
 export async function readCustomListings(): Promise<ListingRecord[]> {
   try {
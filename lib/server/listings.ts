@@ -1,7 +1,8 @@
+import { createHash } from 'node:crypto';
 import { promises as fs } from 'node:fs';
 import path from 'node:path';
-import { readClaims, type ListingClaim } from './claims.js';
-import { readCustomListings, writeCustomListings } from './custom-listings.js';
+import { CLAIMS_PATH, type ListingClaim } from './claims.js';
+import { CUSTOM_LISTINGS_PATH, readCustomListings, writeCustomListings } from './custom-listings.js';
 
 export interface ListingRecord {
   id: string;
@@ -23,18 +24,125 @@ export interface ListingRecord {
   featuredInstagramPosts?: string[];
 }
 
+interface FileStamp {
+  size: number;
+  mtimeMs: number;
+}
+
+// Written by scripts/build_listings_json.py (materialize_listings); keep the
+// shape and fingerprint() in step with it.
+interface MaterializedListings {
+  version: number;
+  generation: string;
+  sources: { listings: string; claims: string; custom: string };
+  listingsFile: FileStamp | null;
+  claims: Record<string, ListingClaim>;
+  customCount: number;
+  bases: Record<string, ListingRecord>;
+  listings: ListingRecord[];
+}
+
+const MATERIALIZED_VERSION = 2;
+const MATERIALIZED_PATH = path.join(process.cwd(), 'data', 'listings.materialized.json');
+const LISTINGS_PATH = path.join(process.cwd(), 'data', 'listings.json');
+
 let cache: ListingRecord[] | null = null;
+let materialized: { mtimeMs: number; view: MaterializedListings } | null = null;
+
+function fingerprint(text: string): string {
+  return createHash('sha256').update(text, 'utf8').digest('hex').slice(0, 16);
+}
+
+async function readTextOr(filePath: string, fallback: string): Promise<string> {
+  try {
+    return await fs.readFile(filePath, 'utf8');
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException)?.code === 'ENOENT') {
+      return fallback;
+    }
+    throw error;
+  }
+}
+
+// Whole milliseconds, matching file_stamp() in scripts/build_listings_json.py.
+async function statFile(filePath: string): Promise<FileStamp | null> {
+  try {
+    const stats = await fs.stat(filePath, { bigint: true });
+    return { size: Number(stats.size), mtimeMs: Number(stats.mtimeNs / BigInt(1_000_000)) };
+  } catch {
+    return null;
+  }
+}
+
+// The view is gitignored but listings.json is committed, so a pull can leave
+// the view behind; it only counts while listings.json is exactly the file it
+// was built from and not newer than the view itself.
+async function readMaterialized(): Promise<MaterializedListings | null> {
+  const [viewFile, listingsFile] = await Promise.all([statFile(MATERIALIZED_PATH), statFile(LISTINGS_PATH)]);
+  if (!viewFile || !listingsFile) {
+    return null;
+  }
+  if (materialized?.mtimeMs !== viewFile.mtimeMs) {
+    const view = JSON.parse(await fs.readFile(MATERIALIZED_PATH, 'utf8')) as MaterializedListings;
+    materialized = view.version === MATERIALIZED_VERSION ? { mtimeMs: viewFile.mtimeMs, view } : null;
+  }
+  const built = materialized?.view.listingsFile;
+  if (
+    !built ||
+    built.size !== listingsFile.size ||
+    built.mtimeMs !== listingsFile.mtimeMs ||
+    listingsFile.mtimeMs > viewFile.mtimeMs
+  ) {
+    return null;
+  }
+  return materialized!.view;
+}
+
+// Re-apply only the claims that differ from the ones baked into the view;
+// custom listings are few, so they are always rebuilt.
+function rematerialize(
+  view: MaterializedListings,
+  claims: Record<string, ListingClaim>,
+  customListings: ListingRecord[]
+): ListingRecord[] {
+  const changed = new Set<string>();
+  new Set([...Object.keys(view.claims), ...Object.keys(claims)]).forEach((slug) => {
+    if (JSON.stringify(view.claims[slug] ?? null) !== JSON.stringify(claims[slug] ?? null)) {
+      changed.add(slug);
+    }
+  });
+  const catalog = view.listings
+    .slice(0, view.listings.length - view.customCount)
+    .map((listing, index) =>
+      changed.has(listing.slug) ? applyClaimOverride(view.bases[index] ?? listing, claims[listing.slug]) : listing
+    );
+  return [...catalog, ...customListings.map((listing) => applyClaimOverride(listing, claims[listing.slug]))];
+}
 
 export async function loadListings(): Promise<ListingRecord[]> {
   if (cache) {
     return cache;
   }
 
-  const filePath = path.join(process.cwd(), 'data', 'listings.json');
-  const text = await fs.readFile(filePath, 'utf8');
+  const [claimsText, customText, view] = await Promise.all([
+    readTextOr(CLAIMS_PATH, '{}\n'),
+    readTextOr(CUSTOM_LISTINGS_PATH, '[]\n'),
+    readMaterialized(),
+  ]);
+  if (view && view.sources.claims === fingerprint(claimsText) && view.sources.custom === fingerprint(customText)) {
+    cache = view.listings;
+    return cache;
+  }
+
+  const claims = JSON.parse(claimsText) as Record<string, ListingClaim>;
+  const customListings = JSON.parse(customText) as ListingRecord[];
+  if (view) {
+    cache = rematerialize(view, claims, customListings);
+    return cache;
+  }
+
+  const text = await fs.readFile(LISTINGS_PATH, 'utf8');
   const listings = JSON.parse(text) as ListingRecord[];
-  const customListings = await readCustomListings();
-  const claims = await readClaims();
   const combined = [...listings, ...customListings];
   cache = combined.map((listing) => applyClaimOverride(listing, claims[listing.slug]));
   return cache!;
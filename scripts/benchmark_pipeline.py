@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Measure how the build stages scale on synthetic datasets of increasing size."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+from generate_synthetic_listings import generate, load_profile
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STAGES: list[tuple[str, list[str]]] = [
+    ("refine_listings", ["refine_listings.py", "listings.txt", "refined.txt"]),
+    (
+        "join_listing_details",
+        [
+            "join_listing_details.py",
+            "--details-csv",
+            "listing_details.csv",
+            "--refined",
+            "refined.txt",
+            "--output",
+            "listing_details_with_descriptions.csv",
+        ],
+    ),
+    ("build_listings_json", ["build_listings_json.py"]),
+]
+# Scaling exponent (log time ratio / log size ratio) above which a stage is flagged.
+SUPERLINEAR_THRESHOLD = 1.15
+
+
+def run_stage(command: list[str], cwd: Path) -> tuple[float, int]:
+    """Run one stage in a child process and return (wall seconds, peak RSS bytes)."""
+    script, *arguments = command
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / script), *arguments],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    stderr = process.stderr.read().decode("utf-8", "replace") if process.stderr else ""
+    if process.returncode != 0:
+        raise RuntimeError(f"{script} exited with {process.returncode}: {stderr.strip()}")
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS.
+    peak = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return elapsed, peak
+
+
+def scaling_exponent(smaller: tuple[int, float], larger: tuple[int, float]) -> float | None:
+    (size_a, value_a), (size_b, value_b) = smaller, larger
+    if size_a == size_b or value_a <= 0 or value_b <= 0:
+        return None
+    return math.log(value_b / value_a) / math.log(size_b / size_a)
+
+
+def print_report(results: list[dict[str, object]]) -> None:
+    print(f"{'stage':<24}{'listings':>10}{'wall s':>10}{'peak MiB':>10}{'time exp':>10}{'rss exp':>10}")
+    for stage, _ in STAGES:
+        previous: dict[str, object] | None = None
+        for result in results:
+            measurement = result["stages"][stage]
+            time_exp = rss_exp = None
+            if previous is not None:
+                time_exp = scaling_exponent(
+                    (previous["count"], previous["stages"][stage]["seconds"]),
+                    (result["count"], measurement["seconds"]),
+                )
+                rss_exp = scaling_exponent(
+                    (previous["count"], previous["stages"][stage]["peak_rss"]),
+                    (result["count"], measurement["peak_rss"]),
+                )
+            flag = " <- superlinear" if time_exp is not None and time_exp > SUPERLINEAR_THRESHOLD else ""
+            print(
+                f"{stage:<24}{result['count']:>10}{measurement['seconds']:>10.2f}"
+                f"{measurement['peak_rss'] / 2**20:>10.1f}"
+                f"{'' if time_exp is None else f'{time_exp:.2f}':>10}"
+                f"{'' if rss_exp is None else f'{rss_exp:.2f}':>10}{flag}"
+            )
+            previous = result
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--scales",
+        default="10000,100000,1000000",
+        help="Comma separated listing counts to benchmark.",
+    )
+    parser.add_argument(
+        "--details-csv",
+        type=Path,
+        default=Path("listing_details.csv"),
+        help="Real listing_details.csv to model synthetic data on.",
+    )
+    parser.add_argument(
+        "--listings-txt",
+        type=Path,
+        default=Path("listings.txt"),
+        help="Real listings.txt to model synthetic data on.",
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        help="Where to generate datasets (default: a temporary directory).",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep generated datasets and outputs instead of deleting them.",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        default=Path("bench_results.json"),
+        help="Where to write the raw measurements as JSON.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator.")
+    args = parser.parse_args(argv)
+
+    scales = sorted({int(value) for value in args.scales.split(",") if value.strip()})
+    profile = load_profile(args.details_csv, args.listings_txt)
+    work_root = args.work_dir or Path(tempfile.mkdtemp(prefix="listings-bench-"))
+
+    results: list[dict[str, object]] = []
+    try:
+        for count in scales:
+            dataset = work_root / f"n{count}"
+            print(f"Generating {count} listings in {dataset}", file=sys.stderr)
+            generate(profile, dataset, count, seed=args.seed)
+            stages: dict[str, dict[str, float]] = {}
+            for stage, command in STAGES:
+                seconds, peak = run_stage(command, dataset)
+                stages[stage] = {"seconds": seconds, "peak_rss": peak}
+                print(f"  {stage}: {seconds:.2f}s, {peak / 2**20:.1f} MiB", file=sys.stderr)
+            results.append({"count": count, "stages": stages})
+            if not args.keep:
+                shutil.rmtree(dataset, ignore_errors=True)
+    finally:
+        if not args.keep and args.work_dir is None:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    args.results.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
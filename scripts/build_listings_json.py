@@ -5,10 +5,41 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
+import os
 import re
+import tempfile
 from pathlib import Path
 
+from listing_patches import diff_records
+from search_index import DEFAULT_SEARCH_INDEX, build_search_index, load_popularity
+
+DEFAULT_CSV_PATH = Path("listing_details_with_descriptions.csv")
+DEFAULT_OUTPUT = Path("data/listings.json")
+DEFAULT_PUBLIC_OUTPUT = Path("public/data/listings.json")
+DEFAULT_IMAGE_MANIFEST = Path("public/listing-images/manifest.json")
+CLAIMS_PATH = Path("data/listing-claims.json")
+PUBLIC_CLAIMS_PATH = Path("public/data/listing-claims.json")
+CUSTOM_LISTINGS_PATH = Path("data/custom-listings.json")
+PUBLIC_CUSTOM_LISTINGS_PATH = Path("public/data/custom-listings.json")
+BUMPS_PATH = Path("data/bumps.json")
+DEFAULT_HASHED_DIR = Path("public/data/immutable")
+DEFAULT_HASHED_URL_PREFIX = "/data/immutable"
+DEFAULT_POINTER_MANIFEST = Path("public/data/manifest.json")
+DEFAULT_KEEP_GENERATIONS = 3
+DEFAULT_KEEP_PATCHES = 24
+DEFAULT_HTML_TEMPLATE = Path("dist/index.html")
+# Outside dist, which vite empties on every build, and inside node_modules/.cache,
+# which Vercel restores between builds.
+DEFAULT_STATIC_PAGES_CACHE = Path("node_modules/.cache/static-pages")
+# The pointer manifest and hashed files are build outputs (not committed), so
+# the previous deploy's generations, which the patch chain starts from, are
+# kept here between builds.
+DEFAULT_PUBLISH_HISTORY = Path("node_modules/.cache/published-data")
+DEFAULT_MATERIALIZED_OUTPUT = Path("data/listings.materialized.json")
+MATERIALIZED_VERSION = 2
+
 
 def slugify(value: str) -> str:
     value = value.lower().strip()
@@ -25,105 +56,464 @@ def split_list(value: str | None, delimiter: str) -> list[str]:
     return [part for part in parts if part]
 
 
+def read_image_manifest(path: Path) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def build_entry(row: dict[str, str], manifest: dict[str, str]) -> dict[str, object]:
+    listing_id = (row.get("listing_id") or "").strip()
+    name = (row.get("name") or "").strip()
+    tags = split_list(row.get("tags"), ",")
+    description = (row.get("description") or "").strip()
+    remote_image = (row.get("image_url") or "").strip()
+    raw_local_image = manifest.get(listing_id, "")
+    local_image = (
+        raw_local_image
+        if not raw_local_image
+        else raw_local_image
+        if raw_local_image.startswith("/")
+        else f"/{raw_local_image}"
+    )
+
+    return {
+        "id": listing_id,
+        "slug": slugify(name or listing_id or "listing"),
+        "name": name,
+        "url": (row.get("url") or "").strip(),
+        "location": (row.get("location") or "").strip(),
+        "address": (row.get("address") or "").strip(),
+        "primaryCategory": tags[0] if tags else "",
+        "tags": tags,
+        "imageUrl": local_image or remote_image,
+        "remoteImageUrl": remote_image,
+        "imageLocalPath": local_image or "",
+        "mapEmbedUrl": (row.get("map_embed_url") or "").strip(),
+        "mapLatitude": (row.get("map_latitude") or "").strip(),
+        "mapLongitude": (row.get("map_longitude") or "").strip(),
+        "description": description,
+        "contacts": {
+            "phone": split_list(row.get("phone"), ";"),
+            "whatsapp": split_list(row.get("whatsapp"), ";"),
+            "email": split_list(row.get("email"), ";"),
+            "line": split_list(row.get("line"), ";"),
+            "website": split_list(row.get("website"), ";"),
+            "facebook": split_list(row.get("facebook"), ";"),
+            "instagram": split_list(row.get("instagram"), ";"),
+            "tiktok": split_list(row.get("tiktok"), ";"),
+            "youtube": split_list(row.get("youtube"), ";"),
+        },
+    }
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
         "--csv-path",
         type=Path,
-        default=Path("listing_details_with_descriptions.csv"),
+        default=DEFAULT_CSV_PATH,
         help="Source CSV file produced by join_listing_details.py",
     )
     parser.add_argument(
         "--output",
         type=Path,
-        default=Path("data/listings.json"),
+        default=DEFAULT_OUTPUT,
         help="Primary JSON path used by the API layer.",
     )
     parser.add_argument(
         "--public-output",
         type=Path,
-        default=Path("public/data/listings.json"),
+        default=DEFAULT_PUBLIC_OUTPUT,
         help="Optional second path for serving JSON directly to the frontend.",
     )
     parser.add_argument(
         "--image-manifest",
         type=Path,
-        default=Path("public/listing-images/manifest.json"),
+        default=DEFAULT_IMAGE_MANIFEST,
         help="Optional manifest produced by download_listing_images.py",
     )
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        default=DEFAULT_SEARCH_INDEX,
+        help="Where to write the autocomplete index for the search box.",
+    )
+    parser.add_argument(
+        "--hashed-dir",
+        type=Path,
+        default=DEFAULT_HASHED_DIR,
+        help="Directory for content-hashed copies of the public data files.",
+    )
+    parser.add_argument(
+        "--hashed-url-prefix",
+        default=DEFAULT_HASHED_URL_PREFIX,
+        help="URL path the hashed directory is served from.",
+    )
+    parser.add_argument(
+        "--pointer-manifest",
+        type=Path,
+        default=DEFAULT_POINTER_MANIFEST,
+        help="Small JSON file mapping each public data file to its current hashed copy.",
+    )
+    parser.add_argument(
+        "--keep-generations",
+        type=int,
+        default=DEFAULT_KEEP_GENERATIONS,
+        help="How many hashed generations of each file to keep before deleting older ones.",
+    )
+    parser.add_argument(
+        "--keep-patches",
+        type=int,
+        default=DEFAULT_KEEP_PATCHES,
+        help="How many listings.json generation-to-generation patches to keep in the version chain.",
+    )
+    parser.add_argument(
+        "--publish-history",
+        type=Path,
+        default=DEFAULT_PUBLISH_HISTORY,
+        help="Where the pointer manifest and hashed files are kept between builds.",
+    )
+    parser.add_argument(
+        "--materialized-output",
+        type=Path,
+        default=DEFAULT_MATERIALIZED_OUTPUT,
+        help="Listings with claims applied and custom listings merged, for the API layer.",
+    )
+    parser.add_argument(
+        "--static-pages-dir",
+        type=Path,
+        help="Pre-render listing and category pages into this directory (e.g. dist).",
+    )
+    parser.add_argument(
+        "--html-template",
+        type=Path,
+        default=DEFAULT_HTML_TEMPLATE,
+        help="Built SPA shell to render static pages from.",
+    )
+    parser.add_argument(
+        "--static-pages-cache",
+        type=Path,
+        default=DEFAULT_STATIC_PAGES_CACHE,
+        help="Where rendered page fragments are kept between builds.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Worker processes for static page rendering (default: CPU count).",
+    )
     args = parser.parse_args()
 
-    manifest: dict[str, str] = {}
-    if args.image_manifest.exists():
-        manifest = json.loads(args.image_manifest.read_text(encoding="utf-8"))
+    manifest = read_image_manifest(args.image_manifest)
 
     with args.csv_path.open("r", encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle)
-        listings: list[dict[str, object]] = []
-        for row in reader:
-            listing_id = (row.get("listing_id") or "").strip()
-            name = (row.get("name") or "").strip()
-            tags = split_list(row.get("tags"), ",")
-            description = (row.get("description") or "").strip()
-            remote_image = (row.get("image_url") or "").strip()
-            raw_local_image = manifest.get(listing_id, "")
-            local_image = (
-                raw_local_image
-                if not raw_local_image
-                else raw_local_image
-                if raw_local_image.startswith("/")
-                else f"/{raw_local_image}"
-            )
-
-            entry = {
-                "id": listing_id,
-                "slug": slugify(name or listing_id or "listing"),
-                "name": name,
-                "url": (row.get("url") or "").strip(),
-                "location": (row.get("location") or "").strip(),
-                "address": (row.get("address") or "").strip(),
-                "primaryCategory": tags[0] if tags else "",
-                "tags": tags,
-                "imageUrl": local_image or remote_image,
-                "remoteImageUrl": remote_image,
-                "imageLocalPath": local_image or "",
-                "mapEmbedUrl": (row.get("map_embed_url") or "").strip(),
-                "mapLatitude": (row.get("map_latitude") or "").strip(),
-                "mapLongitude": (row.get("map_longitude") or "").strip(),
-                "description": description,
-                "contacts": {
-                    "phone": split_list(row.get("phone"), ";"),
-                    "whatsapp": split_list(row.get("whatsapp"), ";"),
-                    "email": split_list(row.get("email"), ";"),
-                    "line": split_list(row.get("line"), ";"),
-                    "website": split_list(row.get("website"), ";"),
-                    "facebook": split_list(row.get("facebook"), ";"),
-                    "instagram": split_list(row.get("instagram"), ";"),
-                    "tiktok": split_list(row.get("tiktok"), ";"),
-                    "youtube": split_list(row.get("youtube"), ";"),
-                },
-            }
-            listings.append(entry)
+        listings = [build_entry(row, manifest) for row in csv.DictReader(handle)]
 
     payload = json.dumps(listings, ensure_ascii=False, indent=2)
 
     for destination in {args.output, args.public_output}:
-        destination.parent.mkdir(parents=True, exist_ok=True)
-        destination.write_text(payload, encoding="utf-8")
-        print(f"Wrote {len(listings)} listings to {destination}")
+        if write_text_if_changed(destination, payload):
+            print(f"Wrote {len(listings)} listings to {destination}")
+        else:
+            print(f"{destination} unchanged ({len(listings)} listings)")
+
+    claims = sync_public_data_file(CLAIMS_PATH, PUBLIC_CLAIMS_PATH, "{}\n")
+    custom = sync_public_data_file(CUSTOM_LISTINGS_PATH, PUBLIC_CUSTOM_LISTINGS_PATH, "[]\n")
+    materialized, _ = materialize_listings(listings, payload, claims, custom, listings_file=file_stamp(args.output))
+    if write_text_if_changed(args.materialized_output, render_materialized(materialized)):
+        print(f"Wrote materialized listings (generation {materialized['generation']}) to {args.materialized_output}")
+
+    # Built from the materialized view so claimed names and categories are searchable.
+    search_index = render_search_index(materialized["listings"])  # type: ignore[arg-type]
+    if write_text_if_changed(args.search_index, search_index):
+        print(f"Wrote search index to {args.search_index}")
+
+    restore_published(args.publish_history, args.hashed_dir, args.pointer_manifest)
+    publish_hashed(
+        {
+            args.public_output.name: payload,
+            PUBLIC_CLAIMS_PATH.name: claims,
+            PUBLIC_CUSTOM_LISTINGS_PATH.name: custom,
+            args.search_index.name: search_index,
+        },
+        args.hashed_dir,
+        args.hashed_url_prefix,
+        args.pointer_manifest,
+        args.keep_generations,
+        patch_keys={args.public_output.name: "id"},
+        keep_patches=args.keep_patches,
+    )
+    save_published(args.publish_history, args.hashed_dir, args.pointer_manifest)
 
-    sync_public_data_file(Path("data/listing-claims.json"), Path("public/data/listing-claims.json"), "{}\n")
-    sync_public_data_file(Path("data/custom-listings.json"), Path("public/data/custom-listings.json"), "[]\n")
+    if args.static_pages_dir:
+        # Imported lazily: static_pages builds on helpers from this module.
+        from static_pages import render_static_pages
+
+        render_static_pages(
+            materialized["listings"],  # type: ignore[arg-type]
+            args.html_template,
+            args.static_pages_dir,
+            args.jobs,
+            args.static_pages_cache,
+        )
     return 0
 
 
-def sync_public_data_file(source: Path, destination: Path, default_contents: str) -> None:
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    if source.exists():
-        destination.write_text(source.read_text(encoding="utf-8"), encoding="utf-8")
+def fingerprint(contents: str) -> str:
+    return hashlib.sha256(contents.encode("utf-8")).hexdigest()[:16]
+
+
+def file_stamp(path: Path) -> dict[str, int]:
+    """Size and whole-millisecond mtime, as lib/server/listings.ts stats them."""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtimeMs": stat.st_mtime_ns // 1_000_000}
+
+
+def materialize_listings(
+    listings: list[dict[str, object]],
+    listings_payload: str,
+    claims_text: str,
+    custom_text: str,
+    previous: dict[str, object] | None = None,
+    listings_file: dict[str, int] | None = None,
+) -> tuple[dict[str, object], int]:
+    """Apply claims and append custom listings, ready for lib/server/listings.ts.
+
+    ``sources`` holds fingerprints of the three inputs and ``generation``
+    combines them, so the server can tell whether the view is current by
+    hashing the (small) claims and custom files alone. ``listings_file`` is
+    the ``file_stamp`` of the written listings JSON: that file is committed
+    while the view is not, so the server compares stamps instead of hashing
+    the catalog to notice a pull that left the view behind. ``bases`` keeps the
+    unclaimed record for every claimed catalog entry, which lets a claim edit
+    be re-applied to the affected slugs only, here when ``previous`` was built
+    from the same listings payload, and on the server via rematerialize().
+    Returns the view and the number of records whose override was recomputed.
+    """
+    claims: dict[str, dict[str, object]] = json.loads(claims_text or "{}")
+    custom: list[dict[str, object]] = json.loads(custom_text or "[]")
+    sources = {
+        "listings": fingerprint(listings_payload),
+        "claims": fingerprint(claims_text),
+        "custom": fingerprint(custom_text),
+    }
+
+    reusable = (
+        previous is not None
+        and previous.get("version") == MATERIALIZED_VERSION
+        and previous["sources"]["listings"] == sources["listings"]  # type: ignore[index]
+    )
+    if reusable:
+        old_claims: dict[str, object] = previous["claims"]  # type: ignore[index,assignment]
+        old_view: list[dict[str, object]] = previous["listings"]  # type: ignore[index,assignment]
+        changed = {slug for slug in old_claims.keys() | claims.keys() if old_claims.get(slug) != claims.get(slug)}
+        catalog = old_view[: len(old_view) - int(previous["customCount"])]  # type: ignore[index,arg-type]
     else:
-        destination.write_text(default_contents, encoding="utf-8")
-    print(f"Synced {destination} from {source}")
+        changed = None
+        catalog = listings
+
+    rebuilt = 0
+    view: list[dict[str, object]] = []
+    bases: dict[str, dict[str, object]] = {}
+    for index, listing in enumerate(catalog):
+        slug = str(listing.get("slug") or "")
+        if changed is None or slug in changed:
+            listing = apply_claim_override(listings[index], claims.get(slug))
+            rebuilt += 1
+        if slug in claims:
+            bases[str(index)] = listings[index]
+        view.append(listing)
+    view.extend(apply_claim_override(listing, claims.get(str(listing.get("slug") or ""))) for listing in custom)
+
+    return (
+        {
+            "version": MATERIALIZED_VERSION,
+            "generation": fingerprint("".join(sources.values())),
+            "sources": sources,
+            "listingsFile": listings_file,
+            "claims": claims,
+            "customCount": len(custom),
+            "bases": bases,
+            "listings": view,
+        },
+        rebuilt + len(custom),
+    )
+
+
+def render_materialized(view: dict[str, object]) -> str:
+    return json.dumps(view, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_claim_override(listing: dict[str, object], claim: dict[str, object] | None) -> dict[str, object]:
+    """Python twin of applyClaimOverride in lib/server/listings.ts."""
+    if not claim:
+        return listing
+    merged = {**listing, "contacts": dict(listing.get("contacts") or {})}
+    for field in ("name", "primaryCategory", "location", "address", "description"):
+        if claim.get(field):
+            merged[field] = claim[field]
+    for field in ("website", "phone", "email"):
+        if claim.get(field):
+            merged["contacts"][field] = [claim[field]]
+    posts = [url for url in claim.get("instagramPosts") or [] if str(url).strip()]
+    if posts:
+        merged["featuredInstagramPosts"] = posts
+    return merged
+
+
+def render_search_index(listings: list[dict[str, object]]) -> str:
+    index = build_search_index(listings, load_popularity(BUMPS_PATH))
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_text_atomic(destination: Path, contents: str) -> None:
+    write_bytes_atomic(destination, contents.encode("utf-8"))
+
+
+def write_bytes_atomic(destination: Path, contents: bytes) -> None:
+    """Write via a sibling temp file + rename so readers never see a partial file."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{destination.name}.", suffix=".tmp", dir=destination.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(contents)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_text_if_changed(destination: Path, contents: str) -> bool:
+    if destination.exists() and destination.read_text(encoding="utf-8") == contents:
+        return False
+    write_text_atomic(destination, contents)
+    return True
+
+
+def sync_public_data_file(source: Path, destination: Path, default_contents: str) -> str:
+    contents = source.read_text(encoding="utf-8") if source.exists() else default_contents
+    if write_text_if_changed(destination, contents):
+        print(f"Synced {destination} from {source}")
+    return contents
+
+
+def publish_hashed(
+    artifacts: dict[str, str],
+    directory: Path,
+    url_prefix: str,
+    pointer_path: Path,
+    keep_generations: int,
+    patch_keys: dict[str, str] | None = None,
+    keep_patches: int = DEFAULT_KEEP_PATCHES,
+) -> None:
+    """Publish ``artifacts`` as immutable content-addressed files.
+
+    Each artifact lands at ``<stem>.<hash><suffix>`` in ``directory`` and is
+    only written when no file with that hash exists yet. The pointer manifest
+    maps the logical name to the current copy and remembers the last
+    ``keep_generations`` copies; anything older is deleted. Artifacts not
+    passed in keep their existing pointer entries.
+
+    Artifacts named in ``patch_keys`` (JSON arrays of records, keyed by the
+    given field) also get a ``<stem>.<from>-<to>.patch<suffix>`` file against
+    the previous generation, and their pointer entry lists the last
+    ``keep_patches`` of these as a version chain so clients can catch up
+    without refetching the whole file.
+    """
+    pointer: dict[str, dict[str, object]] = {}
+    if pointer_path.exists():
+        pointer = json.loads(pointer_path.read_text(encoding="utf-8"))
+
+    for name, contents in artifacts.items():
+        data = contents.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        stem, suffix = os.path.splitext(name)
+        filename = f"{stem}.{digest[:16]}{suffix}"
+        target = directory / filename
+        if not target.exists():
+            write_text_atomic(target, contents)
+            print(f"Published {target}")
+
+        entry = pointer.get(name, {})
+        previous: list[str] = entry.get("generations", [])  # type: ignore[assignment]
+        patches: list[dict[str, object]] = entry.get("patches", [])  # type: ignore[assignment]
+        if patch_keys and name in patch_keys and previous and previous[0] != filename:
+            patch = publish_patch(directory / previous[0], contents, patch_keys[name], digest[:16], directory)
+            if patch is not None:
+                patch["url"] = f"{url_prefix.rstrip('/')}/{patch.pop('filename')}"
+                patches = [patch, *patches]
+        for stale in patches[max(keep_patches, 0) :]:
+            (directory / str(stale["url"]).rsplit("/", 1)[-1]).unlink(missing_ok=True)
+
+        generations = [filename, *(generation for generation in previous if generation != filename)]
+        for stale in generations[max(keep_generations, 1) :]:
+            (directory / stale).unlink(missing_ok=True)
+            print(f"Removed stale generation {directory / stale}")
+
+        pointer[name] = {
+            "url": f"{url_prefix.rstrip('/')}/{filename}",
+            "sha256": digest,
+            "bytes": len(data),
+            "generations": generations[: max(keep_generations, 1)],
+        }
+        if patch_keys and name in patch_keys:
+            pointer[name]["patches"] = patches[: max(keep_patches, 0)]
+
+    if write_text_if_changed(pointer_path, json.dumps(pointer, indent=2, sort_keys=True) + "\n"):
+        print(f"Updated {pointer_path}")
+
+
+def restore_published(history_dir: Path, directory: Path, pointer_path: Path) -> None:
+    """Seed a clean checkout with the generations the previous build published."""
+    saved_pointer = history_dir / pointer_path.name
+    if pointer_path.exists() or not saved_pointer.exists():
+        return
+    for saved in (history_dir / directory.name).glob("*"):
+        if not (directory / saved.name).exists():
+            write_bytes_atomic(directory / saved.name, saved.read_bytes())
+    write_bytes_atomic(pointer_path, saved_pointer.read_bytes())
+    print(f"Restored published generations from {history_dir}")
+
+
+def save_published(history_dir: Path, directory: Path, pointer_path: Path) -> None:
+    """Mirror the pointer manifest and hashed files into ``history_dir`` for the next build."""
+    mirror = history_dir / directory.name
+    mirror.mkdir(parents=True, exist_ok=True)
+    current = {path.name for path in directory.glob("*") if path.is_file() and not path.name.startswith(".")}
+    for name in current:
+        # Hashed names are content-addressed, so an existing copy is up to date.
+        if not (mirror / name).exists():
+            write_bytes_atomic(mirror / name, (directory / name).read_bytes())
+    for stale in {path.name for path in mirror.glob("*")} - current:
+        (mirror / stale).unlink(missing_ok=True)
+    write_bytes_atomic(history_dir / pointer_path.name, pointer_path.read_bytes())
+
+
+def publish_patch(
+    previous_path: Path, contents: str, key_field: str, version: str, directory: Path
+) -> dict[str, object] | None:
+    """Write the patch from the generation at ``previous_path`` to ``contents``."""
+    if not previous_path.exists():
+        return None
+    # Hashed filenames are <stem>.<version><suffix>.
+    previous_version = previous_path.suffixes[-2].lstrip(".")
+    patch = diff_records(
+        json.loads(previous_path.read_text(encoding="utf-8")),
+        json.loads(contents),
+        key_field,
+        previous_version,
+        version,
+    )
+    stem = previous_path.name.split(".", 1)[0]
+    filename = f"{stem}.{previous_version}-{version}.patch{previous_path.suffix}"
+    rendered = json.dumps(patch, ensure_ascii=False, separators=(",", ":"))
+    write_text_atomic(directory / filename, rendered)
+    print(
+        f"Published {directory / filename} ({len(patch['added'])} added, "  # type: ignore[arg-type]
+        f"{len(patch['changed'])} changed, {len(patch['removed'])} removed)"  # type: ignore[arg-type]
+    )
+    return {"from": previous_version, "to": version, "bytes": len(rendered.encode("utf-8")), "filename": filename}
 
 
 if __name__ == "__main__":
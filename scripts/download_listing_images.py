@@ -13,14 +13,7 @@ from pathlib import Path
 from typing import Iterable
 from urllib.parse import urlparse
 
-import requests
-
-DEFAULT_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-    )
-}
+import http_client
 
 
 def read_rows(csv_path: Path) -> Iterable[dict[str, str]]:
@@ -48,24 +41,29 @@ def determine_extension(url: str, content_type: str | None) -> str:
 
 def download_image(url: str, destination: Path, timeout: float) -> Path | None:
     try:
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout, stream=True)
+        response = http_client.open_stream(url, timeout)
     except Exception as exc:  # pragma: no cover - network
         print(f"[warn] Failed to fetch {url}: {exc}", file=sys.stderr)
         return None
 
-    if response.status_code >= 400:
-        print(f"[warn] Got HTTP {response.status_code} for {url}", file=sys.stderr)
-        return None
-
-    content_type = response.headers.get("Content-Type")
-    ext = determine_extension(url, content_type)
-    final_path = destination.with_suffix(ext)
-    final_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with final_path.open("wb") as handle:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                handle.write(chunk)
+    with response:
+        if response.status_code >= 400:
+            print(f"[warn] Got HTTP {response.status_code} for {url}", file=sys.stderr)
+            return None
+
+        content_type = response.headers.get("Content-Type")
+        ext = determine_extension(url, content_type)
+        final_path = destination.with_suffix(ext)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with final_path.open("wb") as handle:
+                for chunk in http_client.iter_body(response):
+                    handle.write(chunk)
+        except Exception as exc:  # pragma: no cover - network
+            final_path.unlink(missing_ok=True)
+            print(f"[warn] Failed to download {url}: {exc}", file=sys.stderr)
+            return None
 
     return final_path
 
@@ -5,22 +5,21 @@ from __future__ import annotations
 
 import argparse
 import csv
+import json
+import os
 import re
+import shutil
 import sys
+import time
 from collections import defaultdict
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Iterable
 
-import requests
 from lxml import etree
 from lxml.html import html5parser
 
-DEFAULT_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-    )
-}
+import http_client
+from recrawl_scheduler import DEFAULT_HISTORY, RecrawlHistory, claimed_urls, content_hash
 
 
 def strip_namespaces(root: etree._Element) -> None:
@@ -31,7 +30,7 @@ def strip_namespaces(root: etree._Element) -> None:
 
 
 def fetch_listing_urls(sitemap_url: str, base_url: str, timeout: float) -> list[str]:
-    response = requests.get(sitemap_url, headers=DEFAULT_HEADERS, timeout=timeout)
+    response = http_client.get(sitemap_url, timeout)
     response.raise_for_status()
     try:
         document = etree.fromstring(response.content)
@@ -94,7 +93,7 @@ def parse_place_coordinates(src: str) -> tuple[str, str]:
 
 
 def extract_listing(url: str, timeout: float) -> dict[str, str]:
-    response = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+    response = http_client.get(url, timeout)
     response.raise_for_status()
 
     document = html5parser.fromstring(response.content)
@@ -162,38 +161,149 @@ def extract_listing(url: str, timeout: float) -> dict[str, str]:
     }
 
 
+FIELDNAMES = [
+    "listing_id",
+    "url",
+    "name",
+    "location",
+    "tags",
+    "address",
+    "image_url",
+    "map_embed_url",
+    "map_latitude",
+    "map_longitude",
+    "phone",
+    "whatsapp",
+    "email",
+    "line",
+    "website",
+    "facebook",
+    "instagram",
+    "tiktok",
+    "youtube",
+]
+
+
 def write_csv(path: Path, rows: list[dict[str, str]]) -> None:
     if not rows:
         return
     path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = [
-        "listing_id",
-        "url",
-        "name",
-        "location",
-        "tags",
-        "address",
-        "image_url",
-        "map_embed_url",
-        "map_latitude",
-        "map_longitude",
-        "phone",
-        "whatsapp",
-        "email",
-        "line",
-        "website",
-        "facebook",
-        "instagram",
-        "tiktok",
-        "youtube",
-    ]
     with path.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
         writer.writeheader()
         for row in rows:
             writer.writerow(row)
 
 
+class ExportCheckpoint:
+    """Append-only JSONL journal of which listing URLs finished or failed.
+
+    The journal is the source of truth for ``--resume``: a row only counts as
+    exported once its ``done`` entry is on disk, so a crash between writing a
+    CSV row and journaling it just means that listing is fetched again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        self.failed: dict[str, str] = {}
+        self._handle: IO[str] | None = None
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted run
+                url = entry.get("url", "")
+                if entry.get("status") == "done":
+                    self.done.add(url)
+                    self.failed.pop(url, None)
+                elif entry.get("status") == "failed" and url not in self.done:
+                    self.failed[url] = entry.get("error", "")
+
+    def open(self, resume: bool) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("a" if resume else "w", encoding="utf-8")
+
+    def mark_done(self, url: str) -> None:
+        self.done.add(url)
+        self.failed.pop(url, None)
+        self._append({"url": url, "status": "done"})
+
+    def mark_done_many(self, urls: Iterable[str]) -> None:
+        entries = [{"url": url, "status": "done"} for url in urls]
+        self.done.update(entry["url"] for entry in entries)
+        self._append(*entries)
+
+    def mark_failed(self, url: str, error: str) -> None:
+        self.failed[url] = error
+        self._append({"url": url, "status": "failed", "error": error})
+
+    def _append(self, *entries: dict[str, str]) -> None:
+        assert self._handle is not None
+        self._handle.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def compact_csv(path: Path, done_urls: set[str]) -> set[str]:
+    """Keep only journaled rows in an existing CSV so a resumed run can append to it.
+
+    Returns the URLs that are actually present afterwards.
+    """
+    if not path.exists():
+        return set()
+    kept: dict[str, dict[str, str]] = {}
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            url = row.get("url") or ""
+            if url in done_urls and url not in kept:
+                kept[url] = row
+    if kept:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        write_csv(tmp_path, list(kept.values()))
+        os.replace(tmp_path, path)
+    else:
+        path.unlink()
+    return set(kept)
+
+
+def export_pass(
+    urls: list[str],
+    timeout: float,
+    writer: csv.DictWriter,
+    output_handle: IO[str],
+    checkpoint: ExportCheckpoint,
+    label: str,
+    history: RecrawlHistory,
+) -> int:
+    collected = 0
+    for index, url in enumerate(urls, start=1):
+        try:
+            row = extract_listing(url, timeout)
+        except Exception as exc:  # pragma: no cover
+            checkpoint.mark_failed(url, str(exc))
+            print(f"[warn] Failed to process {url}: {exc}", file=sys.stderr)
+            continue
+        writer.writerow(row)
+        output_handle.flush()
+        os.fsync(output_handle.fileno())
+        checkpoint.mark_done(url)
+        changed = history.record(url, content_hash(row), time.time())
+        collected += 1
+        print(f"[{label} {index}/{len(urls)}] Collected {url}{'' if changed else ' (unchanged)'}")
+    return collected
+
+
 def main(argv: Iterable[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Export listing metadata to CSV.")
     parser.add_argument(
@@ -223,31 +333,129 @@ def main(argv: Iterable[str] | None = None) -> int:
         default=Path("listing_details.csv"),
         help="Where to write the CSV output.",
     )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Journal of completed/failed listings (default: <output>.checkpoint.jsonl).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a previous run, only fetching listings missing from the checkpoint.",
+    )
+    parser.add_argument(
+        "--retry-passes",
+        type=int,
+        default=1,
+        help="How many extra passes to make over listings that failed.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        help=(
+            "Fetch at most this many listings this run, picking those most likely to have "
+            "changed; the rest are carried over from the existing output."
+        ),
+    )
+    parser.add_argument(
+        "--history",
+        type=Path,
+        default=DEFAULT_HISTORY,
+        help="Per-listing fetch/change history used to prioritise --budget runs.",
+    )
     args = parser.parse_args(argv)
+    checkpoint_path = args.checkpoint or args.output.with_name(f"{args.output.name}.checkpoint.jsonl")
+    # Rows stream here and only replace --output once the run completes, so a
+    # failed crawl never truncates the last good export.
+    partial_path = args.output.with_name(f"{args.output.name}.partial")
 
     try:
         urls = fetch_listing_urls(args.sitemap_url, args.base_url, args.timeout)
     except Exception as exc:  # pragma: no cover
         parser.exit(status=1, message=f"error: {exc}\n")
 
+    # Sync against the whole sitemap before --limit trims it, so a test run
+    # does not erase the history of the listings it skips.
+    history = RecrawlHistory(args.history)
+    history.load()
+    history.sync(urls, time.time())
     if args.limit is not None:
         urls = urls[: args.limit]
-
-    rows: list[dict[str, str]] = []
-    for index, url in enumerate(urls, start=1):
-        try:
-            rows.append(extract_listing(url, args.timeout))
-        except Exception as exc:  # pragma: no cover
-            print(f"[warn] Failed to process {url}: {exc}", file=sys.stderr)
-        else:
-            print(f"[{index}/{len(urls)}] Collected {url}")
-
-    if not rows:
+    elif not args.resume:
+        # Resumed and --limit runs are not new crawls; counting them would
+        # shorten run_interval_days() and with it the scheduling horizon.
+        history.start_run(time.time())
+
+    checkpoint = ExportCheckpoint(checkpoint_path)
+    existing = 0
+    if args.resume:
+        checkpoint.load()
+        if not partial_path.exists() and args.output.exists():
+            # The previous run completed; resume from its output to retry failures.
+            shutil.copyfile(args.output, partial_path)
+        checkpoint.done = compact_csv(partial_path, checkpoint.done)
+        existing = len(checkpoint.done)
+        print(f"Resuming: {existing} listings already exported, {len(checkpoint.failed)} previously failed")
+
+    pending = [url for url in urls if url not in checkpoint.done]
+    carried: list[dict[str, str]] = []
+    if args.budget is not None:
+        scheduled = history.schedule(pending, args.budget, claimed_urls(args.output), time.time())
+        if args.output.exists():
+            # Resumed runs need this too: pending already leaves out what the
+            # partial holds, and everything else must survive the final replace.
+            skipped = set(pending) - set(scheduled)
+            with args.output.open("r", encoding="utf-8", newline="") as handle:
+                carried = [row for row in csv.DictReader(handle) if row.get("url") in skipped]
+        print(f"Scheduled {len(scheduled)} of {len(pending)} listings; carrying over {len(carried)} rows from the last export")
+        pending = scheduled
+
+    checkpoint.open(resume=args.resume)
+    partial_path.parent.mkdir(parents=True, exist_ok=True)
+    collected = 0
+    try:
+        with partial_path.open("a" if existing else "w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
+            if not existing:
+                writer.writeheader()
+            if carried:
+                writer.writerows(carried)
+                handle.flush()
+                os.fsync(handle.fileno())
+                checkpoint.mark_done_many(row["url"] for row in carried)
+                existing += len(carried)
+            collected = export_pass(pending, args.timeout, writer, handle, checkpoint, "fetch", history)
+            for attempt in range(1, args.retry_passes + 1):
+                retry = [url for url in pending if url in checkpoint.failed]
+                if not retry:
+                    break
+                print(f"Retry pass {attempt}: {len(retry)} failed listings")
+                collected += export_pass(
+                    retry, args.timeout, writer, handle, checkpoint, f"retry {attempt}", history
+                )
+    except KeyboardInterrupt:
+        print(
+            f"\nInterrupted; progress is saved in {checkpoint_path} and {partial_path}, rerun with --resume.",
+            file=sys.stderr,
+        )
+        return 130
+    finally:
+        checkpoint.close()
+        history.save()
+
+    total = existing + collected
+    if not total:
+        partial_path.unlink(missing_ok=True)
         print("No listings collected.", file=sys.stderr)
         return 1
 
-    write_csv(args.output, rows)
-    print(f"Wrote {len(rows)} listings to {args.output}")
+    os.replace(partial_path, args.output)
+    print(f"Wrote {total} listings to {args.output} ({collected} this run)")
+    if checkpoint.failed:
+        print(
+            f"{len(checkpoint.failed)} listings still failing; rerun with --resume to retry them.",
+            file=sys.stderr,
+        )
     return 0
 
 
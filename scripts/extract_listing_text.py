@@ -4,8 +4,12 @@
 from __future__ import annotations
 
 import argparse
+import base64
 import csv
+import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable, Sequence
 
@@ -13,12 +17,7 @@ import requests
 from lxml import etree
 from lxml.html import html5parser
 
-DEFAULT_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-    )
-}
+import http_client
 
 
 def strip_namespaces(root: etree._Element) -> None:
@@ -41,7 +40,7 @@ def squash_text(node: etree._Element) -> str:
 
 def extract_text(url: str, xpath: str, timeout: float) -> list[str]:
     """Return a list of text blobs that match the supplied XPath."""
-    response = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+    response = http_client.get(url, timeout)
     response.raise_for_status()
 
     document = html5parser.fromstring(response.content)
@@ -59,7 +58,7 @@ def fetch_listing_urls_from_sitemap(
     sitemap_url: str, base_url: str, timeout: float
 ) -> list[str]:
     """Return all listing URLs in the sitemap that match the base URL."""
-    response = requests.get(sitemap_url, headers=DEFAULT_HEADERS, timeout=timeout)
+    response = http_client.get(sitemap_url, timeout)
     response.raise_for_status()
 
     try:
@@ -87,6 +86,187 @@ def fetch_listing_urls_from_sitemap(
     return urls
 
 
+class MissingIdCache:
+    """Remember listing IDs that did not exist, as expiring bitset blocks.
+
+    IDs are grouped into blocks of ``BLOCK_SIZE``; each block stores a bitmap
+    of known-missing IDs plus the time it was started. Once a block is older
+    than the TTL it is dropped as a whole, so deleted-then-recreated IDs get
+    re-probed eventually without tracking a timestamp per ID.
+
+    IDs last seen to exist are kept in ``present`` so sparse scans always
+    re-probe them, and ``runs`` counts discovery runs so each run can start
+    its sparse stride at a different offset.
+    """
+
+    BLOCK_SIZE = 1024
+
+    def __init__(self, path: Path | None, ttl_seconds: float) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._blocks: dict[int, tuple[float, bytearray]] = {}
+        self.present: set[int] = set()
+        self.runs = 0
+
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if data.get("block_size") != self.BLOCK_SIZE:
+            return
+        self.runs = int(data.get("runs", 0))
+        self.present = set(data.get("present", []))
+        now = time.time()
+        for key, entry in data.get("blocks", {}).items():
+            started = float(entry["started"])
+            if now - started < self.ttl_seconds:
+                self._blocks[int(key)] = (started, bytearray(base64.b64decode(entry["bits"])))
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        blocks = {
+            str(index): {"started": started, "bits": base64.b64encode(bytes(bits)).decode("ascii")}
+            for index, (started, bits) in sorted(self._blocks.items())
+            if any(bits)
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(
+                {"block_size": self.BLOCK_SIZE, "runs": self.runs, "present": sorted(self.present), "blocks": blocks}
+            ),
+            encoding="utf-8",
+        )
+
+    def _locate(self, listing_id: int, create: bool) -> tuple[bytearray | None, int, int]:
+        index, offset = divmod(listing_id, self.BLOCK_SIZE)
+        block = self._blocks.get(index)
+        if block is not None and time.time() - block[0] >= self.ttl_seconds:
+            del self._blocks[index]
+            block = None
+        if block is None and create:
+            block = (time.time(), bytearray(self.BLOCK_SIZE // 8))
+            self._blocks[index] = block
+        return (block[1] if block else None), offset // 8, 1 << (offset % 8)
+
+    def is_missing(self, listing_id: int) -> bool:
+        bits, byte, mask = self._locate(listing_id, create=False)
+        return bool(bits and bits[byte] & mask)
+
+    def mark_missing(self, listing_id: int) -> None:
+        bits, byte, mask = self._locate(listing_id, create=True)
+        bits[byte] |= mask
+        self.present.discard(listing_id)
+
+    def mark_present(self, listing_id: int) -> None:
+        self.present.add(listing_id)
+        bits, byte, mask = self._locate(listing_id, create=False)
+        if bits:
+            bits[byte] &= ~mask & 0xFF
+
+
+def probe_listing(url: str, timeout: float) -> bool | None:
+    """Cheaply check whether a listing exists without downloading the page.
+
+    Returns ``None`` when the answer is unclear (errors, throttling) so the
+    caller can fall back to a full fetch rather than lose a listing.
+    """
+    listing_id = url.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        response = http_client.head(url, timeout, allow_redirects=True)
+        if response.status_code in (405, 501):
+            response = http_client.open_stream(url, timeout, headers={"Range": "bytes=0-0"}, allow_redirects=True)
+            response.close()
+    except requests.RequestException:
+        return None
+
+    if response.status_code in (404, 410):
+        return False
+    if response.status_code in (200, 206):
+        # Missing listings may redirect back to the directory index.
+        return response.url.rstrip("/").rsplit("/", 1)[-1] == listing_id
+    return None
+
+
+def discover_listing_ids(
+    start_id: int,
+    end_id: int,
+    base_url: str,
+    timeout: float,
+    workers: int,
+    cache: MissingIdCache,
+    sparse_after: int,
+    sparse_stride: int,
+    sparse_offset: int = 0,
+) -> list[int]:
+    """Probe an ID range concurrently and return the IDs worth fully fetching.
+
+    Known-missing IDs from ``cache`` are skipped outright. After
+    ``sparse_after`` consecutive misses only every ``sparse_stride``-th ID is
+    probed, counted from ``start_id + sparse_offset`` so the stride lines up
+    with the same absolute IDs however the run got there, plus any ID
+    ``cache`` last saw exist; a hit in that mode backfills the skipped IDs
+    before it and switches back to probing every ID. Callers should step the
+    offset through ``range(sparse_stride)`` between runs so every ID is probed
+    at least once every ``sparse_stride`` runs.
+    """
+    base = base_url.rstrip("/")
+    found: set[int] = set()
+    # IDs already probed or queued for a probe, so backfill and the dense
+    # rescan after a sparse hit never probe the same ID twice.
+    scheduled: set[int] = set()
+    probed = 0
+    backfill: list[int] = []
+    miss_run = 0
+    next_id = start_id
+    batch_size = max(workers, 1) * 4
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while backfill or next_id <= end_id:
+            sparse = miss_run >= sparse_after and not backfill
+            step = max(sparse_stride, 1) if sparse else 1
+            batch, backfill = backfill, []
+            while len(batch) < batch_size and next_id <= end_id:
+                candidate = next_id
+                next_id += 1
+                if sparse and (candidate - start_id - sparse_offset) % step and candidate not in cache.present:
+                    continue
+                if candidate not in scheduled and not cache.is_missing(candidate):
+                    batch.append(candidate)
+                    scheduled.add(candidate)
+            if not batch:
+                continue
+
+            results = executor.map(lambda listing_id: probe_listing(f"{base}/{listing_id}", timeout), batch)
+            for listing_id, exists in zip(batch, results):
+                probed += 1
+                if exists is False:
+                    cache.mark_missing(listing_id)
+                    miss_run += 1
+                    continue
+                if exists:
+                    cache.mark_present(listing_id)
+                found.add(listing_id)
+                miss_run = 0
+                if sparse:
+                    gap = [
+                        candidate
+                        for candidate in range(max(start_id, listing_id - step + 1), listing_id)
+                        if candidate not in scheduled and not cache.is_missing(candidate)
+                    ]
+                    backfill.extend(gap)
+                    scheduled.update(gap)
+                    next_id = min(next_id, listing_id + 1)
+
+            print(
+                f"[discover] up to {min(next_id - 1, end_id)}: {len(found)} found, "
+                f"{probed} probed{' (sparse)' if sparse else ''}",
+                file=sys.stderr,
+            )
+
+    return sorted(found)
+
+
 def resolve_targets(args: argparse.Namespace) -> list[str]:
     """Build the set of listing URLs requested for extraction."""
     targets: list[str] = []
@@ -108,7 +288,29 @@ def resolve_targets(args: argparse.Namespace) -> list[str]:
     elif args.start_id is not None and args.end_id is not None:
         if args.end_id < args.start_id:
             raise ValueError("--end-id must be >= --start-id")
-        for listing_id in range(args.start_id, args.end_id + 1):
+        listing_ids: Iterable[int] = range(args.start_id, args.end_id + 1)
+        if args.discover:
+            cache = MissingIdCache(args.missing_id_cache, args.missing_id_ttl_days * 86400)
+            cache.load()
+            sparse_offset = cache.runs % max(args.sparse_stride, 1)
+            cache.runs += 1
+            if args.workers > http_client.POOL_MAXSIZE:
+                http_client.configure(pool_maxsize=args.workers)
+            try:
+                listing_ids = discover_listing_ids(
+                    args.start_id,
+                    args.end_id,
+                    args.base_url,
+                    args.timeout,
+                    args.workers,
+                    cache,
+                    args.sparse_after,
+                    args.sparse_stride,
+                    sparse_offset,
+                )
+            finally:
+                cache.save()
+        for listing_id in listing_ids:
             targets.append(f"{args.base_url.rstrip('/')}/{listing_id}")
     else:
         targets.append(args.url)
@@ -159,6 +361,41 @@ def main(argv: Iterable[str] | None = None) -> int:
         type=int,
         help="Last listing ID in a range to fetch (requires --start-id).",
     )
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help="With --start-id/--end-id, probe IDs cheaply first and only fetch ones that exist.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Concurrent probes when using --discover.",
+    )
+    parser.add_argument(
+        "--missing-id-cache",
+        type=Path,
+        default=Path(".listing-id-cache.json"),
+        help="Where --discover remembers IDs that did not exist.",
+    )
+    parser.add_argument(
+        "--missing-id-ttl-days",
+        type=float,
+        default=7,
+        help="How long a known-missing ID is trusted before it is probed again.",
+    )
+    parser.add_argument(
+        "--sparse-after",
+        type=int,
+        default=50,
+        help="Consecutive misses before --discover starts skipping through the range.",
+    )
+    parser.add_argument(
+        "--sparse-stride",
+        type=int,
+        default=8,
+        help="Probe every Nth ID while in a sparse region.",
+    )
     parser.add_argument(
         "--listings-file",
         type=Path,
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Generate synthetic pipeline inputs at arbitrary scale from the real dataset."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from build_listings_json import slugify, split_list
+from refine_listings import START_RE
+
+ID_FIELDS = ("url", "image_url")
+
+
+@dataclass
+class SourceProfile:
+    """Real rows and raw listings.txt sections that synthetic records are drawn from.
+
+    Every synthetic field is sampled independently from a randomly chosen real
+    row, which keeps per-field distributions (tag counts, fill rates of each
+    contact column, description length and line counts, multiline CSV fields)
+    intact while mixing them into new combinations.
+    """
+
+    fieldnames: list[str]
+    rows: list[dict[str, str]]
+    sections: list[list[str]]
+    event_ratio: float
+
+
+def load_profile(details_csv: Path, listings_txt: Path) -> SourceProfile:
+    with details_csv.open("r", encoding="utf-8", newline="") as handle:
+        reader = csv.DictReader(handle)
+        rows = [row for row in reader if (row.get("listing_id") or "").strip()]
+        fieldnames = list(reader.fieldnames or [])
+    if not rows:
+        raise ValueError(f"No rows found in {details_csv}")
+
+    sections: list[list[str]] = []
+    events = 0
+    current: list[str] | None = None
+    for line in listings_txt.read_text(encoding="utf-8").splitlines():
+        if START_RE.match(line):
+            if '"Events","' in line:
+                events += 1
+            current = []
+            sections.append(current)
+            continue
+        if current is not None:
+            current.append(line)
+    if not sections:
+        raise ValueError(f"No listing sections found in {listings_txt}")
+
+    return SourceProfile(fieldnames=fieldnames, rows=rows, sections=sections, event_ratio=events / len(sections))
+
+
+def synthesize_row(profile: SourceProfile, listing_id: int, rng: random.Random) -> dict[str, str]:
+    row: dict[str, str] = {}
+    for field in profile.fieldnames:
+        template = rng.choice(profile.rows)
+        value = template.get(field) or ""
+        if field in ID_FIELDS and value:
+            value = value.replace(f"/{template['listing_id']}", f"/{listing_id}")
+        row[field] = value
+    row["listing_id"] = str(listing_id)
+    row["name"] = f"{rng.choice(profile.rows)['name'].strip()} {listing_id}"
+    return row
+
+
+def write_listings_section(handle, profile: SourceProfile, row: dict[str, str], rng: random.Random) -> None:
+    name = "Events" if rng.random() < profile.event_ratio else row["name"]
+    handle.write(f'{row["listing_id"]} - "{name}","\n')
+    for line in rng.choice(profile.sections):
+        handle.write(line + "\n")
+
+
+def synthesize_claim(row: dict[str, str], template: dict[str, str]) -> dict[str, object]:
+    tags = split_list(template.get("tags"), ",")
+    websites = split_list(template.get("website"), ";")
+    phones = split_list(template.get("phone"), ";")
+    return {
+        "name": f"{row['name']} (claimed)",
+        "primaryCategory": tags[0] if tags else "",
+        "location": (template.get("location") or "").strip(),
+        "address": "",
+        "description": "",
+        "website": websites[0] if websites else "",
+        "phone": phones[0] if phones else "",
+        "email": "",
+        "instagramPosts": [],
+    }
+
+
+def synthesize_custom_listing(index: int, template: dict[str, str]) -> dict[str, object]:
+    tags = split_list(template.get("tags"), ",")[:1] or ["Local Business"]
+    name = f"{template['name'].strip()} custom {index}"
+    return {
+        "id": f"custom-{index}",
+        "slug": slugify(name),
+        "name": name,
+        "url": "",
+        "location": (template.get("location") or "").strip(),
+        "address": "",
+        "primaryCategory": tags[0],
+        "tags": tags,
+        "imageUrl": "https://placehold.co/600x400?text=Samui+Connect",
+        "remoteImageUrl": "https://placehold.co/600x400?text=Samui+Connect",
+        "description": "Description coming soon.",
+        "contacts": {"website": [], "phone": split_list(template.get("phone"), ";")[:1], "email": []},
+        "featuredInstagramPosts": [],
+    }
+
+
+def generate(
+    profile: SourceProfile,
+    output_dir: Path,
+    count: int,
+    seed: int = 0,
+    start_id: int = 100_000,
+    claim_ratio: float = 0.02,
+    custom_ratio: float = 0.01,
+) -> None:
+    """Write listings.txt, listing_details.csv and data/ claim + custom files into ``output_dir``."""
+    rng = random.Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "data").mkdir(exist_ok=True)
+
+    claims: dict[str, dict[str, object]] = {}
+    with (output_dir / "listing_details.csv").open("w", encoding="utf-8", newline="") as details, (
+        output_dir / "listings.txt"
+    ).open("w", encoding="utf-8") as raw:
+        writer = csv.DictWriter(details, fieldnames=profile.fieldnames)
+        writer.writeheader()
+        raw.write("listing_url,match_index,text\n\n")
+        for listing_id in range(start_id, start_id + count):
+            row = synthesize_row(profile, listing_id, rng)
+            writer.writerow(row)
+            write_listings_section(raw, profile, row, rng)
+            if rng.random() < claim_ratio:
+                claims[slugify(row["name"])] = synthesize_claim(row, rng.choice(profile.rows))
+
+    custom = [synthesize_custom_listing(index, rng.choice(profile.rows)) for index in range(int(count * custom_ratio))]
+    (output_dir / "data" / "listing-claims.json").write_text(json.dumps(claims, indent=2), encoding="utf-8")
+    (output_dir / "data" / "custom-listings.json").write_text(json.dumps(custom, indent=2), encoding="utf-8")
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("count", type=int, help="Number of synthetic listings to generate.")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("synthetic"),
+        help="Directory to write the generated inputs into.",
+    )
+    parser.add_argument(
+        "--details-csv",
+        type=Path,
+        default=Path("listing_details.csv"),
+        help="Real listing_details.csv to model field distributions on.",
+    )
+    parser.add_argument(
+        "--listings-txt",
+        type=Path,
+        default=Path("listings.txt"),
+        help="Real listings.txt to model description sections on.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible output.")
+    parser.add_argument(
+        "--claim-ratio",
+        type=float,
+        default=0.02,
+        help="Fraction of listings that get a synthetic claim override.",
+    )
+    parser.add_argument(
+        "--custom-ratio",
+        type=float,
+        default=0.01,
+        help="Number of custom listings to add, as a fraction of count.",
+    )
+    args = parser.parse_args(argv)
+
+    profile = load_profile(args.details_csv, args.listings_txt)
+    generate(
+        profile,
+        args.output_dir,
+        args.count,
+        seed=args.seed,
+        claim_ratio=args.claim_ratio,
+        custom_ratio=args.custom_ratio,
+    )
+    print(f"Generated {args.count} synthetic listings in {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
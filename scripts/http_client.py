@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Shared pooled HTTP session for the crawl and download scripts."""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+from typing import Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+# urllib3 only decodes brotli when one of these packages is installed, so only
+# advertise it then.
+BROTLI_AVAILABLE = any(importlib.util.find_spec(name) for name in ("brotli", "brotlicffi"))
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Encoding": "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate",
+    "Connection": "keep-alive",
+}
+CONNECT_TIMEOUT = 10.0
+# Hosts kept in the pool (the site, its CDN, the sitemap host) and connections
+# kept per host; raise the latter to the worker count for concurrent callers.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+# Cap on decoded body size, which also guards against compression bombs.
+MAX_BODY_BYTES = 16 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(requests.RequestException):
+    """Raised when a response body exceeds the configured size cap."""
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def configure(pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """Replace the shared session, e.g. to size the pool for ``pool_maxsize`` threads."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = create_session(max(pool_maxsize, 1))
+        return _session
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def timeouts(timeout: float) -> tuple[float, float]:
+    """(connect, read) timeouts; connecting never waits longer than CONNECT_TIMEOUT."""
+    return (min(CONNECT_TIMEOUT, timeout), timeout)
+
+
+def iter_body(response: requests.Response, max_bytes: int = MAX_BODY_BYTES) -> Iterator[bytes]:
+    """Yield decoded body chunks, raising ResponseTooLarge once ``max_bytes`` is exceeded."""
+    declared = response.headers.get("Content-Length", "")
+    encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+    if declared.isdigit() and not encoded and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{response.url} declares {declared} bytes (limit {max_bytes})")
+    received = 0
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        received += len(chunk)
+        if received > max_bytes:
+            raise ResponseTooLarge(f"{response.url} exceeded {max_bytes} bytes")
+        if chunk:
+            yield chunk
+
+
+def open_stream(url: str, timeout: float, method: str = "GET", **kwargs) -> requests.Response:
+    """Send a request on the shared session without reading the body.
+
+    Callers must close the response (or use it as a context manager) so the
+    connection goes back to the pool.
+    """
+    return get_session().request(method, url, timeout=timeouts(timeout), stream=True, **kwargs)
+
+
+def request(
+    method: str, url: str, timeout: float, max_bytes: int = MAX_BODY_BYTES, **kwargs
+) -> requests.Response:
+    """Send a request on the shared session and read the body under ``max_bytes``."""
+    with open_stream(url, timeout, method=method, **kwargs) as response:
+        body = b"" if method.upper() == "HEAD" else b"".join(iter_body(response, max_bytes))
+    response._content = body
+    return response
+
+
+def get(url: str, timeout: float, **kwargs) -> requests.Response:
+    return request("GET", url, timeout, **kwargs)
+
+
+def head(url: str, timeout: float, **kwargs) -> requests.Response:
+    return request("HEAD", url, timeout, **kwargs)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Serve listing images resized and transcoded on demand, with a bounded cache."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from PIL import Image, ImageOps
+
+from build_listings_json import write_bytes_atomic
+
+DEFAULT_ROOT = Path("public/listing-images")
+DEFAULT_CACHE_DIR = Path(".image-cache")
+URL_PREFIX = "/listing-images/"
+# Requested widths are rounded up to one of these so the number of variants
+# per image (and the cache's working set) stays small.
+WIDTHS = (80, 160, 320, 480, 640, 960, 1280, 1920)
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+FORMAT_ALIASES = {"jpg": "jpeg"}
+# Only these select a variant; anything else (e.g. the ?t= cache-buster listing
+# image URLs carry) is ignored and the original is served.
+VARIANT_PARAMS = {"w", "width", "format", "fm"}
+CACHE_CONTROL = "public, max-age=86400"
+
+
+class RequestError(ValueError):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class DiskCache:
+    """Variant files in one directory, evicted least-recently-used past ``max_bytes``.
+
+    Recency survives restarts through file mtimes, which are bumped on every
+    hit; the in-memory order is rebuilt from them at startup.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        files = [path for path in directory.iterdir() if path.is_file() and not path.name.startswith(".")]
+        for path in sorted(files, key=lambda path: path.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def get(self, name: str) -> bytes | None:
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = self.directory / name
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+            return None
+        return data
+
+    def put(self, name: str, data: bytes) -> None:
+        write_bytes_atomic(self.directory / name, data)
+        with self._lock:
+            self._total += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            (self.directory / name).unlink(missing_ok=True)
+            self._total -= size
+
+
+class HotSet:
+    """In-memory LRU of the most requested variants, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._total = 0
+
+    def get(self, name: str) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(name)
+            if data is not None:
+                self._entries.move_to_end(name)
+            return data
+
+    def put(self, name: str, data: bytes) -> None:
+        if len(data) > self.max_bytes // 4:
+            return  # one large variant should not flush the whole set
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            self._total += len(data) - (len(previous) if previous is not None else 0)
+            self._entries[name] = data
+            while self._total > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+
+
+def transform(source: Path, width: int | None, format_name: str) -> bytes:
+    pil_format, _, options = FORMATS[format_name]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if width and image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, pil_format, **options)
+        return buffer.getvalue()
+
+
+class ImageStore:
+    """Resolve variant requests through hot set -> disk cache -> single-flight transform."""
+
+    def __init__(self, root: Path, disk: DiskCache, hot: HotSet, max_transforms: int) -> None:
+        self.root = root.resolve()
+        self.disk = disk
+        self.hot = hot
+        self._transforms = threading.BoundedSemaphore(max(max_transforms, 1))
+        self._inflight: dict[str, Future[bytes]] = {}
+        self._inflight_lock = threading.Lock()
+
+    def resolve_source(self, relative: str) -> Path:
+        source = (self.root / relative).resolve()
+        if not source.is_relative_to(self.root) or not source.is_file():
+            raise RequestError(HTTPStatus.NOT_FOUND, "Image not found")
+        return source
+
+    def variant(self, relative: str, width: int | None, format_name: str) -> tuple[str, bytes]:
+        """Return (cache key, bytes) for a variant, transforming at most once per key at a time."""
+        source = self.resolve_source(relative)
+        stat = source.stat()
+        key = hashlib.sha256(
+            f"{relative}\0{stat.st_mtime_ns}\0{stat.st_size}\0{width}\0{format_name}".encode("utf-8")
+        ).hexdigest()[:32]
+        name = f"{key}.{format_name}"
+
+        data = self.hot.get(name)
+        if data is not None:
+            return key, data
+        data = self.disk.get(name)
+        if data is not None:
+            self.hot.put(name, data)
+            return key, data
+
+        with self._inflight_lock:
+            future = self._inflight.get(name)
+            leader = future is None
+            if leader:
+                future = self._inflight[name] = Future()
+        if not leader:
+            return key, future.result()
+
+        try:
+            # A previous leader may have finished between the cache checks above
+            # and registering this flight.
+            data = self.hot.get(name) or self.disk.get(name)
+            if data is None:
+                with self._transforms:
+                    data = transform(source, width, format_name)
+                self.disk.put(name, data)
+            self.hot.put(name, data)
+            future.set_result(data)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[name]
+        return key, data
+
+
+def parse_variant(query: dict[str, list[str]], source: Path) -> tuple[int | None, str]:
+    width: int | None = None
+    raw_width = (query.get("w") or query.get("width") or [""])[0]
+    if raw_width:
+        if not raw_width.isdigit() or int(raw_width) == 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "w must be a positive integer")
+        width = next((candidate for candidate in WIDTHS if candidate >= int(raw_width)), WIDTHS[-1])
+
+    raw_format = (query.get("format") or query.get("fm") or [""])[0].lower()
+    if not raw_format:
+        original = source.suffix.lstrip(".").lower()
+        raw_format = original if FORMAT_ALIASES.get(original, original) in FORMATS else "jpeg"
+    format_name = FORMAT_ALIASES.get(raw_format, raw_format)
+    if format_name not in FORMATS:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(FORMATS)}")
+    return width, format_name
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    store: ImageStore
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        self._serve(send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802 - http.server naming
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        try:
+            if not path.startswith(URL_PREFIX):
+                raise RequestError(HTTPStatus.NOT_FOUND, "Not found")
+            relative = path[len(URL_PREFIX) :]
+            query = parse_qs(url.query)
+            if not query.keys() & VARIANT_PARAMS:
+                self._send_original(self.store.resolve_source(relative), send_body)
+                return
+            width, format_name = parse_variant(query, self.store.resolve_source(relative))
+            key, data = self.store.variant(relative, width, format_name)
+        except RequestError as exc:
+            self.send_error(exc.status, str(exc))
+            return
+        except Exception as exc:  # pragma: no cover - undecodable source etc.
+            self.log_error("Failed to transform %s: %s", self.path, exc)
+            self.send_error(HTTPStatus.UNPROCESSABLE_ENTITY, "Could not process image")
+            return
+
+        etag = f'"{key}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", FORMATS[format_name][1])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _send_original(self, source: Path, send_body: bool) -> None:
+        size = source.stat().st_size
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", mimetypes.guess_type(source.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(source.read_bytes())
+
+
+class ImageServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections during the bursts this server
+    # is meant to absorb.
+    request_queue_size = 128
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=DEFAULT_ROOT,
+        help="Image store populated by download_listing_images.py.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Where resized variants are kept between requests and restarts.",
+    )
+    parser.add_argument("--cache-mb", type=int, default=512, help="Disk cache size limit in MiB.")
+    parser.add_argument("--hot-mb", type=int, default=64, help="In-memory hot set size limit in MiB.")
+    parser.add_argument(
+        "--max-transforms",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="How many resizes may run at once.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8787, help="Port to listen on.")
+    args = parser.parse_args(argv)
+
+    ImageRequestHandler.store = ImageStore(
+        args.root,
+        DiskCache(args.cache_dir, args.cache_mb * 1024 * 1024),
+        HotSet(args.hot_mb * 1024 * 1024),
+        args.max_transforms,
+    )
+    server = ImageServer((args.host, args.port), ImageRequestHandler)
+    print(f"Serving {args.root} at http://{args.host}:{args.port}{URL_PREFIX}<file>?w=<width>&format=<format>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Per-record deltas between two generations of a JSON array of records."""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Iterable
+
+PATCH_VERSION = 1
+
+
+def record_keys(records: list[dict[str, object]], field: str) -> list[str]:
+    """Key each record by ``field``; repeats of a value get ``#1``, ``#2``... in order.
+
+    listing_id is not unique in the scraped data, so the occurrence number
+    keeps keys unique. Mirrored by recordKeys in src/lib/api.ts.
+    """
+    seen: dict[str, int] = {}
+    keys = []
+    for record in records:
+        value = str(record.get(field) or "")
+        count = seen.get(value, 0)
+        seen[value] = count + 1
+        keys.append(f"{value}#{count}" if count else value)
+    return keys
+
+
+def apply_patch(records: list[dict[str, object]], patch: dict[str, object]) -> list[dict[str, object]]:
+    """Apply a patch from diff_records; mirrored by applyListingsPatch in src/lib/api.ts."""
+    removed = set(patch["removed"])  # type: ignore[arg-type]
+    changed = {key: record for key, record in patch["changed"]}  # type: ignore[union-attr]
+    kept = [
+        (key, changed.get(key, record))
+        for key, record in zip(record_keys(records, str(patch["key"])), records)
+        if key not in removed
+    ]
+    if "order" in patch:
+        by_key = dict(kept)
+        by_key.update((key, record) for _, key, record in patch["added"])  # type: ignore[union-attr]
+        return [by_key[key] for key in patch["order"]]  # type: ignore[union-attr]
+    result = [record for _, record in kept]
+    for index, _, record in patch["added"]:  # type: ignore[union-attr]
+        result.insert(index, record)
+    return result
+
+
+def diff_records(
+    old: list[dict[str, object]], new: list[dict[str, object]], field: str, from_version: str, to_version: str
+) -> dict[str, object]:
+    """Describe ``new`` as removed keys, changed records and added records relative to ``old``.
+
+    Added records carry their index in ``new``, which is enough to rebuild
+    the array when surviving records kept their relative order. When they
+    did not (e.g. the CSV was re-sorted) the full key order is included too.
+    """
+    old_keys = record_keys(old, field)
+    new_keys = record_keys(new, field)
+    old_by_key = dict(zip(old_keys, old))
+    new_by_key = dict(zip(new_keys, new))
+    patch: dict[str, object] = {
+        "version": PATCH_VERSION,
+        "key": field,
+        "from": from_version,
+        "to": to_version,
+        "removed": [key for key in old_keys if key not in new_by_key],
+        "changed": [
+            [key, record] for key, record in new_by_key.items() if key in old_by_key and old_by_key[key] != record
+        ],
+        "added": [
+            [index, key, record] for index, (key, record) in enumerate(zip(new_keys, new)) if key not in old_by_key
+        ],
+    }
+    if apply_patch(old, patch) != new:
+        patch["order"] = new_keys
+    return patch
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarise the patch between two listings.json files.")
+    parser.add_argument("old", type=Path, help="Previous generation.")
+    parser.add_argument("new", type=Path, help="Next generation.")
+    parser.add_argument("--key", default="id", help="Record field that identifies a listing.")
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    patch = diff_records(old, new, args.key, args.old.name, args.new.name)
+    size = len(json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    print(
+        f"{len(patch['added'])} added, {len(patch['changed'])} changed, {len(patch['removed'])} removed"  # type: ignore[arg-type]
+        f"{', reordered' if 'order' in patch else ''}; patch is {size} bytes vs {args.new.stat().st_size}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
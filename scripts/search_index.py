@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Build and query the typo-tolerant autocomplete index for listing search."""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable
+
+INDEX_VERSION = 1
+DEFAULT_SEARCH_INDEX = Path("public/data/search-index.json")
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation; mirrored in src/lib/search-index.ts."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD_RE.sub(" ", stripped.lower().replace("&", " and ")).strip()
+
+
+AUXILIARY_PENALTY = 0.25
+EXTENSION_PENALTY = 0.1
+# Single characters match too much of the index to be worth completing.
+MIN_QUERY_LENGTH = 2
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of ``word`` anchored with a leading ``^`` so short words still get some."""
+    padded = f"^{word}"
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def max_edits(token: str) -> int:
+    if len(token) <= 2:
+        return 0
+    if len(token) <= 5:
+        return 1
+    return 2
+
+
+def load_popularity(bumps_path: Path) -> dict[str, int]:
+    """Count bumps per listing slug from the bump store snapshot, if present."""
+    if not bumps_path.exists():
+        return {}
+    records = json.loads(bumps_path.read_text(encoding="utf-8") or "[]")
+    return dict(Counter(str(record.get("slug") or "") for record in records))
+
+
+def build_search_index(listings: Iterable[dict[str, object]], popularity: dict[str, int]) -> dict[str, object]:
+    """Collect listing names, tags and locations into a word/trigram index.
+
+    Each term is ``[text, kind, weight, slug]``. Listing terms are also
+    reachable through their location and primary category words so that
+    queries like "chaweng bar" find bars in Chaweng; those auxiliary postings
+    are stored as ``-(term_index + 1)`` so lookups can rank them below words
+    from the term's own text. Weights are ``log1p`` of bump counts (listings)
+    or listing counts (tags/locations).
+    """
+    tag_counts: Counter[str] = Counter()
+    location_counts: Counter[str] = Counter()
+    terms: list[list[object]] = []
+    term_words: list[tuple[set[str], set[str]]] = []
+
+    for listing in listings:
+        name = str(listing.get("name") or "").strip()
+        slug = str(listing.get("slug") or "")
+        location = str(listing.get("location") or "").strip()
+        category = str(listing.get("primaryCategory") or "").strip()
+        for tag in listing.get("tags") or []:
+            tag_counts[str(tag).strip()] += 1
+        if location:
+            location_counts[location] += 1
+        if not name:
+            continue
+        terms.append([name, "listing", round(1 + math.log1p(popularity.get(slug, 0)), 3), slug])
+        own_words = set(normalize(name).split())
+        term_words.append((own_words, set(normalize(f"{location} {category}").split()) - own_words))
+
+    for kind, counts in (("tag", tag_counts), ("location", location_counts)):
+        for text, count in sorted(counts.items()):
+            if not text:
+                continue
+            terms.append([text, kind, round(1 + math.log1p(count), 3), None])
+            term_words.append((set(normalize(text).split()), set()))
+
+    postings: dict[str, list[int]] = defaultdict(list)
+    for term_index, (own_words, auxiliary_words) in enumerate(term_words):
+        for word in own_words:
+            postings[word].append(term_index)
+        for word in auxiliary_words:
+            postings[word].append(-(term_index + 1))
+
+    words = sorted(postings)
+    trigram_postings: dict[str, list[int]] = defaultdict(list)
+    for word_index, word in enumerate(words):
+        for gram in sorted(trigrams(word)):
+            trigram_postings[gram].append(word_index)
+
+    return {
+        "version": INDEX_VERSION,
+        "terms": terms,
+        "words": words,
+        "postings": [postings[word] for word in words],
+        "trigrams": dict(sorted(trigram_postings.items())),
+    }
+
+
+def bounded_distance(token: str, word: str, limit: int, prefix: bool) -> int | None:
+    """Levenshtein distance (or distance to the closest prefix of ``word``), or None if over ``limit``."""
+    if not prefix and abs(len(token) - len(word)) > limit:
+        return None
+    columns = len(word) if not prefix else min(len(word), len(token) + limit)
+    previous = list(range(columns + 1))
+    for row, token_char in enumerate(token, start=1):
+        current = [row] + [0] * columns
+        for column in range(1, columns + 1):
+            cost = 0 if token_char == word[column - 1] else 1
+            current[column] = min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + cost)
+        if min(current) > limit:
+            return None
+        previous = current
+    distance = min(previous) if prefix else previous[columns]
+    return distance if distance <= limit else None
+
+
+def match_token(index: dict[str, object], token: str, prefix: bool) -> dict[int, float]:
+    """Return ``{word_index: cost}`` for index words matching ``token``.
+
+    Cost is the edit count plus a small penalty when the word merely starts
+    with the token, so exact words outrank longer completions.
+    """
+    words: list[str] = index["words"]  # type: ignore[assignment]
+    limit = max_edits(token)
+    candidates: set[int] = set()
+    if limit == 0:
+        start = bisect.bisect_left(words, token)
+        if prefix:
+            candidates.update(range(start, bisect.bisect_right(words, token + "\uffff")))
+        elif start < len(words) and words[start] == token:
+            candidates.add(start)
+    else:
+        grams = trigrams(token)
+        hits: Counter[int] = Counter()
+        for gram in grams:
+            hits.update(index["trigrams"].get(gram, []))  # type: ignore[union-attr]
+        required = max(1, len(grams) - 3 * limit)
+        candidates.update(word_index for word_index, count in hits.items() if count >= required)
+
+    matches: dict[int, float] = {}
+    for word_index in candidates:
+        word = words[word_index]
+        distance = 0 if limit == 0 else bounded_distance(token, word, limit, prefix)
+        if distance is not None:
+            matches[word_index] = distance + (EXTENSION_PENALTY if word != token else 0)
+    return matches
+
+
+def suggest(index: dict[str, object], query: str, limit: int = 8) -> list[dict[str, object]]:
+    """Top ``limit`` completions for ``query``; the last word is matched as a prefix."""
+    normalized = normalize(query)
+    if len(normalized) < MIN_QUERY_LENGTH:
+        return []
+    tokens = normalized.split()
+    completing = not query[-1:].isspace()
+    postings: list[list[int]] = index["postings"]  # type: ignore[assignment]
+
+    costs: dict[int, float] | None = None
+    for position, token in enumerate(tokens):
+        prefix = completing and position == len(tokens) - 1
+        token_costs: dict[int, float] = {}
+        for word_index, word_cost in match_token(index, token, prefix).items():
+            for posting in postings[word_index]:
+                term_index, cost = (posting, word_cost) if posting >= 0 else (-posting - 1, word_cost + AUXILIARY_PENALTY)
+                if cost < token_costs.get(term_index, cost + 1):
+                    token_costs[term_index] = cost
+        if costs is None:
+            costs = token_costs
+        else:
+            costs = {term: cost + token_costs[term] for term, cost in costs.items() if term in token_costs}
+        if not costs:
+            return []
+
+    terms: list[list[object]] = index["terms"]  # type: ignore[assignment]
+    ranked = sorted(costs.items(), key=lambda item: (-float(terms[item[0]][2]) / (1 + item[1]), terms[item[0]][0]))
+    results: list[dict[str, object]] = []
+    seen: set[tuple[object, object]] = set()
+    for term_index, cost in ranked:
+        text, kind, weight, slug = terms[term_index]
+        if (text, kind) in seen:
+            continue
+        seen.add((text, kind))
+        results.append({"text": text, "kind": kind, "slug": slug, "score": float(weight) / (1 + cost)})
+        if len(results) >= limit:
+            break
+    return results
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Query a search index built by build_listings_json.py.")
+    parser.add_argument("query", help="Text to complete.")
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=DEFAULT_SEARCH_INDEX,
+        help="Search index to query.",
+    )
+    parser.add_argument("--limit", type=int, default=8, help="Number of completions to return.")
+    args = parser.parse_args(argv)
+
+    index = json.loads(args.index.read_text(encoding="utf-8"))
+    for result in suggest(index, args.query, args.limit):
+        print(f"{result['score']:.2f}  {result['kind']:<9} {result['text']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
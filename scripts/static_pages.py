@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Pre-render static HTML for listing and category pages on top of the SPA shell."""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_listings_json import DEFAULT_STATIC_PAGES_CACHE, slugify, write_text_atomic
+
+STATE_FILE = "state.json"
+# Bump when the rendered markup changes so cached fragments are rebuilt.
+RENDER_VERSION = 1
+SITE_NAME = "BizDirectory"
+PAGE_DATA_ID = "page-data"
+DESCRIPTION_LIMIT = 160
+# Listing fields the directory list and map views read; category pages inline
+# only these so a large category stays small. imageUrl already falls back to
+# the remote image, so remoteImageUrl is left out.
+CARD_FIELDS = (
+    "id",
+    "slug",
+    "name",
+    "location",
+    "address",
+    "primaryCategory",
+    "imageUrl",
+    "mapLatitude",
+    "mapLongitude",
+)
+CARD_TAGS = 3
+
+
+def matches_category(listing: dict[str, object], category: str) -> bool:
+    """Same rule as matchesCategory in api/listings.ts."""
+    normalized = category.lower()
+    tags = {str(tag).lower() for tag in listing.get("tags") or []}
+    return str(listing.get("primaryCategory") or "").lower() == normalized or normalized in tags
+
+
+def summarize(text: str) -> str:
+    collapsed = " ".join(text.split())
+    if len(collapsed) <= DESCRIPTION_LIMIT:
+        return collapsed
+    return collapsed[: DESCRIPTION_LIMIT - 1].rsplit(" ", 1)[0] + "…"
+
+
+def listing_card(listing: dict[str, object]) -> dict[str, object]:
+    """The part of a listing a directory card (DirectoryListItem, DirectoryMap) shows."""
+    card = {field: listing[field] for field in CARD_FIELDS if field in listing}
+    card["tags"] = list(listing.get("tags") or [])[:CARD_TAGS]  # type: ignore[call-overload]
+    card["description"] = summarize(str(listing.get("description") or ""))
+    phones = (listing.get("contacts") or {}).get("phone") or []  # type: ignore[union-attr]
+    card["contacts"] = {"phone": phones[:1]}
+    return card
+
+
+def inline_json(data: object) -> str:
+    # "</" would close the surrounding <script> element early.
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def apply_template(template: str, title: str, description: str, image: str, body: str, data_json: str) -> str:
+    escaped_title = html.escape(title)
+    escaped_description = html.escape(description)
+    page = re.sub(r"<title>.*?</title>", f"<title>{escaped_title}</title>", template, count=1, flags=re.S)
+    for pattern, value in (
+        (r'(<meta name="description" content=")[^"]*(")', escaped_description),
+        (r'(<meta property="og:title" content=")[^"]*(")', escaped_title),
+        (r'(<meta property="og:description" content=")[^"]*(")', escaped_description),
+        (r'(<meta property="og:image" content=")[^"]*(")', html.escape(image)),
+        (r'(<meta name="twitter:image" content=")[^"]*(")', html.escape(image)),
+    ):
+        if value:
+            page = re.sub(pattern, lambda match: f"{match.group(1)}{value}{match.group(2)}", page, count=1)
+    return page.replace(
+        '<div id="root"></div>',
+        f'<div id="root">{body}</div>\n    '
+        f'<script id="{PAGE_DATA_ID}" type="application/json">{data_json}</script>',
+        1,
+    )
+
+
+def render_listing_body(listing: dict[str, object]) -> str:
+    name = html.escape(str(listing.get("name") or ""))
+    category = str(listing.get("primaryCategory") or "")
+    location = html.escape(str(listing.get("location") or ""))
+    image = str(listing.get("imageUrl") or "")
+    paragraphs = "".join(
+        f"<p>{html.escape(line)}</p>" for line in str(listing.get("description") or "").splitlines() if line.strip()
+    )
+    contacts = listing.get("contacts") or {}
+    contact_items = "".join(
+        f"<li>{html.escape(kind.title())}: {html.escape(value)}</li>"
+        for kind, values in contacts.items()  # type: ignore[union-attr]
+        for value in values
+    )
+    parts = [
+        '<main class="container mx-auto px-4 py-8 space-y-4">',
+        f'<nav class="text-sm text-muted-foreground"><a href="/directory">Directory</a>'
+        + (f' › <a href="/directory/{slugify(category)}">{html.escape(category)}</a>' if category else "")
+        + "</nav>",
+        f'<h1 class="text-3xl font-bold">{name}</h1>',
+        f'<p class="text-muted-foreground">{" · ".join(filter(None, [html.escape(category), location]))}</p>',
+    ]
+    if image:
+        parts.append(f'<img src="{html.escape(image)}" alt="{name}" class="rounded-lg max-h-96 object-cover" />')
+    if paragraphs:
+        parts.append(f'<section class="space-y-2">{paragraphs}</section>')
+    if contact_items:
+        parts.append(f"<ul>{contact_items}</ul>")
+    parts.append("</main>")
+    return "".join(parts)
+
+
+def render_category_body(category: str, listings: list[dict[str, object]]) -> str:
+    items = "".join(
+        f'<li><a href="/business/{html.escape(str(listing.get("slug") or ""))}">'
+        f'{html.escape(str(listing.get("name") or ""))}</a>'
+        f' <span class="text-muted-foreground">{html.escape(str(listing.get("location") or ""))}</span></li>'
+        for listing in listings
+    )
+    return (
+        '<main class="container mx-auto px-4 py-8 space-y-4">'
+        f'<h1 class="text-3xl font-bold">{html.escape(category)}</h1>'
+        f'<p class="text-muted-foreground">{len(listings)} businesses</p>'
+        f'<ul class="space-y-1">{items}</ul>'
+        "</main>"
+    )
+
+
+def build_pages(listings: list[dict[str, object]]) -> dict[str, dict[str, object]]:
+    """Map output path -> inline page data for every page; rendering needs nothing else."""
+    pages: dict[str, dict[str, object]] = {}
+    for listing in listings:
+        slug = str(listing.get("slug") or "")
+        if slug and f"business/{slug}/index.html" not in pages:
+            pages[f"business/{slug}/index.html"] = {"listing": listing}
+
+    categories = sorted({str(listing.get("primaryCategory") or "") for listing in listings} - {""})
+    for category in categories:
+        members = sorted(
+            (listing for listing in listings if matches_category(listing, category)),
+            key=lambda listing: str(listing.get("name") or ""),
+        )
+        pages[f"directory/{slugify(category)}/index.html"] = {
+            "category": category,
+            "listings": [listing_card(listing) for listing in members],
+        }
+    return pages
+
+
+def render_fragment(data: dict[str, object]) -> dict[str, str]:
+    """Everything page-specific that apply_template() fills into the shell."""
+    if "listing" in data:
+        listing: dict[str, object] = data["listing"]  # type: ignore[assignment]
+        name = str(listing.get("name") or "")
+        title = f"{name} | {SITE_NAME}"
+        description = summarize(str(listing.get("description") or "")) or f"{name} on {SITE_NAME}"
+        image = str(listing.get("imageUrl") or "")
+        body = render_listing_body(listing)
+    else:
+        category = str(data["category"])
+        members: list[dict[str, object]] = data["listings"]  # type: ignore[assignment]
+        title = f"{category} | {SITE_NAME}"
+        description = f"{len(members)} {category} businesses on {SITE_NAME}."
+        image = ""
+        body = render_category_body(category, members)
+    return {"title": title, "description": description, "image": image, "body": body, "data": inline_json(data)}
+
+
+def _render_fragment(job: tuple[Path, dict[str, object]]) -> None:
+    path, data = job
+    write_text_atomic(path, json.dumps(render_fragment(data), ensure_ascii=False))
+
+
+def render_static_pages(
+    listings: list[dict[str, object]],
+    template_path: Path,
+    output_dir: Path,
+    jobs: int | None = None,
+    cache_dir: Path = DEFAULT_STATIC_PAGES_CACHE,
+) -> None:
+    """Render listing and category pages into ``output_dir``.
+
+    Page fragments (title, meta, body, inline data) are cached in
+    ``cache_dir`` and only re-rendered, across ``jobs`` worker processes,
+    when the hash of the page's inline data changes. The fragments do not
+    depend on the SPA shell, so new asset hashes in ``template_path`` only
+    cost a cheap merge of each cached fragment into the new shell.
+    """
+    template = template_path.read_text(encoding="utf-8")
+    state_path = cache_dir / STATE_FILE
+    previous: dict[str, str] = {}
+    if state_path.exists():
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        if state.get("version") == RENDER_VERSION:
+            previous = state.get("pages", {})
+
+    pages = build_pages(listings)
+    hashes: dict[str, str] = {}
+    pending: list[tuple[Path, dict[str, object]]] = []
+    for relative_path, data in pages.items():
+        digest = hashlib.sha256(inline_json(data).encode("utf-8")).hexdigest()
+        hashes[relative_path] = digest
+        fragment_path = cache_dir / f"{relative_path}.json"
+        if previous.get(relative_path) != digest or not fragment_path.exists():
+            pending.append((fragment_path, data))
+
+    if pending:
+        workers = jobs or os.cpu_count() or 1
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_render_fragment, pending, chunksize=max(1, len(pending) // (workers * 4))))
+        else:
+            for job in pending:
+                _render_fragment(job)
+
+    for stale in previous.keys() - hashes.keys():
+        (cache_dir / f"{stale}.json").unlink(missing_ok=True)
+        (output_dir / stale).unlink(missing_ok=True)
+    write_text_atomic(state_path, json.dumps({"version": RENDER_VERSION, "pages": hashes}, indent=2))
+
+    for relative_path in pages:
+        fragment = json.loads((cache_dir / f"{relative_path}.json").read_text(encoding="utf-8"))
+        page = apply_template(
+            template, fragment["title"], fragment["description"], fragment["image"], fragment["body"], fragment["data"]
+        )
+        destination = output_dir / relative_path
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_text(page, encoding="utf-8")
+    print(f"Rendered {len(pending)}/{len(pages)} static pages ({cache_dir}) into {output_dir}")
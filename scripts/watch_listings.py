@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""Watch listing inputs and republish the public data files incrementally."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import textwrap
+import time
+from pathlib import Path
+from typing import Iterable
+
+from build_listings_json import (
+    CLAIMS_PATH,
+    CUSTOM_LISTINGS_PATH,
+    DEFAULT_CSV_PATH,
+    DEFAULT_HASHED_DIR,
+    DEFAULT_HASHED_URL_PREFIX,
+    DEFAULT_IMAGE_MANIFEST,
+    DEFAULT_KEEP_GENERATIONS,
+    DEFAULT_KEEP_PATCHES,
+    DEFAULT_MATERIALIZED_OUTPUT,
+    DEFAULT_OUTPUT,
+    DEFAULT_POINTER_MANIFEST,
+    DEFAULT_PUBLIC_OUTPUT,
+    DEFAULT_SEARCH_INDEX,
+    PUBLIC_CLAIMS_PATH,
+    PUBLIC_CUSTOM_LISTINGS_PATH,
+    build_entry,
+    file_stamp,
+    materialize_listings,
+    publish_hashed,
+    read_image_manifest,
+    render_materialized,
+    render_search_index,
+    write_text_atomic,
+)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Watch the parent directories of ``paths`` through Linux inotify.
+
+    Directories are watched rather than the files themselves so that editors
+    which save by writing a temp file and renaming it over the original are
+    still picked up.
+    """
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._targets: dict[int, dict[str, Path]] = {}
+        by_directory: dict[Path, dict[str, Path]] = {}
+        for path in paths:
+            by_directory.setdefault(path.parent.resolve(), {})[path.name] = path
+        for directory, names in by_directory.items():
+            directory.mkdir(parents=True, exist_ok=True)
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._targets[wd] = names
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: set[Path] = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+                target = self._targets.get(wd, {}).get(name)
+                if target is not None:
+                    changed.add(target)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """mtime/size polling fallback for platforms without inotify."""
+
+    def __init__(self, paths: Iterable[Path], interval: float) -> None:
+        self._paths = list(paths)
+        self._interval = interval
+        self._signatures = {path: self._signature(path) for path in self._paths}
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed: set[Path] = set()
+            for path in self._paths:
+                signature = self._signature(path)
+                if signature != self._signatures[path]:
+                    self._signatures[path] = signature
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            remaining = self._interval if deadline is None else min(self._interval, deadline - time.monotonic())
+            time.sleep(max(remaining, 0))
+
+    def close(self) -> None:
+        pass
+
+
+def render_listings(fragments: list[str]) -> str:
+    """Join pre-rendered entries into the same text ``json.dumps(..., indent=2)`` emits."""
+    if not fragments:
+        return "[]"
+    return "[\n" + ",\n".join(fragments) + "\n]"
+
+
+class ListingsPublisher:
+    """Rebuild only what changed since the previous publish.
+
+    Rendered JSON fragments are cached per CSV row (plus its image manifest
+    entry), so a CSV edit re-renders the touched rows only and the unchanged
+    ones are reused verbatim. Every output is compared with what is already on
+    disk and skipped when identical, and ``publish_hashed`` keeps the
+    content-hashed copies in step (a no-op when the hash has not moved).
+    The materialized view is rebuilt from the previous one, so a claim edit
+    only recomputes the claimed slugs it touched.
+    """
+
+    def __init__(
+        self,
+        csv_path: Path,
+        image_manifest: Path,
+        output: Path,
+        public_output: Path,
+        search_index: Path,
+        materialized_output: Path,
+        hashed_options: tuple[Path, str, Path, int],
+        keep_patches: int = DEFAULT_KEEP_PATCHES,
+    ) -> None:
+        self.csv_path = csv_path
+        self.image_manifest = image_manifest
+        self.output = output
+        self.public_output = public_output
+        self.destinations = list(dict.fromkeys([output, public_output]))
+        self.search_index = search_index
+        self.materialized_output = materialized_output
+        self.hashed_options = hashed_options
+        self.keep_patches = keep_patches
+        self._fieldnames: list[str] | None = None
+        self._fragments: dict[tuple[tuple[str, ...], str], tuple[str, dict[str, object]]] = {}
+        self._listings: list[dict[str, object]] = []
+        self._payload = ""
+        self._materialized: dict[str, object] | None = None
+        self._published: dict[Path, str] = {}
+
+    def publish_listings(self) -> None:
+        manifest = read_image_manifest(self.image_manifest)
+        with self.csv_path.open("r", encoding="utf-8", newline="") as handle:
+            reader = csv.DictReader(handle)
+            if reader.fieldnames != self._fieldnames:
+                self._fieldnames = reader.fieldnames
+                self._fragments.clear()
+
+            fragments: list[str] = []
+            listings: list[dict[str, object]] = []
+            next_cache: dict[tuple[tuple[str, ...], str], tuple[str, dict[str, object]]] = {}
+            rebuilt = 0
+            for row in reader:
+                listing_id = (row.get("listing_id") or "").strip()
+                key = (tuple(value or "" for value in row.values()), manifest.get(listing_id, ""))
+                cached = self._fragments.get(key)
+                if cached is None:
+                    entry = build_entry(row, manifest)
+                    cached = (textwrap.indent(json.dumps(entry, ensure_ascii=False, indent=2), "  "), entry)
+                    rebuilt += 1
+                next_cache[key] = cached
+                fragments.append(cached[0])
+                listings.append(cached[1])
+        self._fragments = next_cache
+        self._listings = listings
+
+        payload = render_listings(fragments)
+        self._payload = payload
+        written = [destination for destination in self.destinations if self._write_if_changed(destination, payload)]
+        if written:
+            targets = ", ".join(str(destination) for destination in written)
+            print(f"Rebuilt {rebuilt}/{len(fragments)} listings and published to {targets}")
+        else:
+            print(f"Rebuilt {rebuilt}/{len(fragments)} listings; outputs unchanged")
+        publish_hashed(
+            {self.public_output.name: payload},
+            *self.hashed_options,
+            patch_keys={self.public_output.name: "id"},
+            keep_patches=self.keep_patches,
+        )
+
+    def publish_search_index(self) -> None:
+        """Index the materialized view, so call after materialize()."""
+        assert self._materialized is not None
+        contents = render_search_index(self._materialized["listings"])  # type: ignore[arg-type]
+        if self._write_if_changed(self.search_index, contents):
+            print(f"Wrote search index to {self.search_index}")
+        publish_hashed({self.search_index.name: contents}, *self.hashed_options)
+
+    def materialize(self) -> None:
+        claims = CLAIMS_PATH.read_text(encoding="utf-8") if CLAIMS_PATH.exists() else "{}\n"
+        custom = CUSTOM_LISTINGS_PATH.read_text(encoding="utf-8") if CUSTOM_LISTINGS_PATH.exists() else "[]\n"
+        view, rebuilt = materialize_listings(
+            self._listings, self._payload, claims, custom, self._materialized, file_stamp(self.output)
+        )
+        self._materialized = view
+        if self._write_if_changed(self.materialized_output, render_materialized(view)):
+            print(f"Materialized generation {view['generation']} ({rebuilt} records recomputed)")
+
+    def sync_side_file(self, source: Path, destination: Path, default_contents: str) -> None:
+        contents = source.read_text(encoding="utf-8") if source.exists() else default_contents
+        if self._write_if_changed(destination, contents):
+            print(f"Synced {destination} from {source}")
+        publish_hashed({destination.name: contents}, *self.hashed_options)
+
+    def _write_if_changed(self, destination: Path, contents: str) -> bool:
+        previous = self._published.get(destination)
+        if previous is None and destination.exists():
+            previous = destination.read_text(encoding="utf-8")
+        if previous == contents:
+            self._published[destination] = contents
+            return False
+        write_text_atomic(destination, contents)
+        self._published[destination] = contents
+        return True
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--csv-path",
+        type=Path,
+        default=DEFAULT_CSV_PATH,
+        help="Source CSV file produced by join_listing_details.py",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help="Primary JSON path used by the API layer.",
+    )
+    parser.add_argument(
+        "--public-output",
+        type=Path,
+        default=DEFAULT_PUBLIC_OUTPUT,
+        help="Second JSON path served directly to the frontend.",
+    )
+    parser.add_argument(
+        "--image-manifest",
+        type=Path,
+        default=DEFAULT_IMAGE_MANIFEST,
+        help="Manifest produced by download_listing_images.py",
+    )
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        default=DEFAULT_SEARCH_INDEX,
+        help="Where to write the autocomplete index for the search box.",
+    )
+    parser.add_argument(
+        "--materialized-output",
+        type=Path,
+        default=DEFAULT_MATERIALIZED_OUTPUT,
+        help="Listings with claims applied and custom listings merged, for the API layer.",
+    )
+    parser.add_argument(
+        "--hashed-dir",
+        type=Path,
+        default=DEFAULT_HASHED_DIR,
+        help="Directory for content-hashed copies of the public data files.",
+    )
+    parser.add_argument(
+        "--hashed-url-prefix",
+        default=DEFAULT_HASHED_URL_PREFIX,
+        help="URL path the hashed directory is served from.",
+    )
+    parser.add_argument(
+        "--pointer-manifest",
+        type=Path,
+        default=DEFAULT_POINTER_MANIFEST,
+        help="Small JSON file mapping each public data file to its current hashed copy.",
+    )
+    parser.add_argument(
+        "--keep-generations",
+        type=int,
+        default=DEFAULT_KEEP_GENERATIONS,
+        help="How many hashed generations of each file to keep before deleting older ones.",
+    )
+    parser.add_argument(
+        "--keep-patches",
+        type=int,
+        default=DEFAULT_KEEP_PATCHES,
+        help="How many listings.json generation-to-generation patches to keep in the version chain.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.2,
+        help="Seconds of quiet to wait for after a change before republishing.",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll file mtimes instead of using inotify.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.25,
+        help="Polling interval in seconds when inotify is unavailable or --poll is set.",
+    )
+    args = parser.parse_args(argv)
+
+    publisher = ListingsPublisher(
+        args.csv_path,
+        args.image_manifest,
+        args.output,
+        args.public_output,
+        args.search_index,
+        args.materialized_output,
+        (args.hashed_dir, args.hashed_url_prefix, args.pointer_manifest, args.keep_generations),
+        args.keep_patches,
+    )
+    side_files = {
+        CLAIMS_PATH: (PUBLIC_CLAIMS_PATH, "{}\n"),
+        CUSTOM_LISTINGS_PATH: (PUBLIC_CUSTOM_LISTINGS_PATH, "[]\n"),
+    }
+    listing_inputs = {args.csv_path, args.image_manifest}
+    watched = [*listing_inputs, *side_files]
+
+    publisher.publish_listings()
+    for source, (destination, default_contents) in side_files.items():
+        publisher.sync_side_file(source, destination, default_contents)
+    publisher.materialize()
+    publisher.publish_search_index()
+
+    watcher: InotifyWatcher | PollingWatcher
+    if args.poll:
+        watcher = PollingWatcher(watched, args.poll_interval)
+    else:
+        try:
+            watcher = InotifyWatcher(watched)
+        except OSError as exc:
+            print(f"[warn] inotify unavailable ({exc}); falling back to polling", file=sys.stderr)
+            watcher = PollingWatcher(watched, args.poll_interval)
+
+    print(f"Watching {', '.join(str(path) for path in watched)} (Ctrl-C to stop)")
+    try:
+        while True:
+            pending = watcher.wait(None)
+            while True:
+                more = watcher.wait(args.debounce)
+                if not more:
+                    break
+                pending |= more
+
+            try:
+                if pending & listing_inputs:
+                    publisher.publish_listings()
+                for source in pending & side_files.keys():
+                    destination, default_contents = side_files[source]
+                    publisher.sync_side_file(source, destination, default_contents)
+                publisher.materialize()
+                # Claims, custom listings and the CSV all feed the index.
+                publisher.publish_search_index()
+            except Exception as exc:  # pragma: no cover - keep the daemon alive on bad edits
+                print(f"[warn] Republish failed, waiting for the next change: {exc}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,6 +22,7 @@ const App = () => (
           <Routes>
             <Route path="/" element={<Index />} />
             <Route path="/directory" element={<Directory />} />
+            <Route path="/directory/:categorySlug" element={<Directory />} />
             <Route path="/business/new" element={<ClaimBusiness mode="create" />} />
             <Route path="/business/:slug/claim" element={<ClaimBusiness />} />
             <Route path="/business/:slug" element={<BusinessDetail />} />
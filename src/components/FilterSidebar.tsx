@@ -4,8 +4,8 @@ import { Checkbox } from "@/components/ui/checkbox";
 import { Slider } from "@/components/ui/slider";
 import { Badge } from "@/components/ui/badge";
 import { Button } from "@/components/ui/button";
-import { Input } from "@/components/ui/input";
 import { X } from "lucide-react";
+import { SearchSuggestInput } from "@/components/SearchSuggestInput";
 
 export interface FilterState {
   categories: string[];
@@ -77,9 +77,9 @@ export const FilterSidebar = ({ filters, categories, locations, defaultCategorie
       <div className="space-y-6">
         <div>
           <Label className="text-sm font-semibold mb-3 block">Search</Label>
-          <Input
+          <SearchSuggestInput
             value={filters.search}
-            onChange={(event) => update({ search: event.target.value })}
+            onChange={(search) => update({ search })}
             placeholder="Search by name, tag, or description"
           />
         </div>
@@ -0,0 +1,96 @@
+import { useState } from "react";
+import { useNavigate } from "react-router-dom";
+import { Input } from "@/components/ui/input";
+import { useSearchSuggestions } from "@/hooks/use-search-suggestions";
+import type { SuggestionKind } from "@/lib/search-index";
+import { cn } from "@/lib/utils";
+
+const KIND_LABELS: Record<SuggestionKind, string> = {
+  listing: "Business",
+  tag: "Tag",
+  location: "Area",
+};
+
+interface SearchSuggestInputProps {
+  id?: string;
+  value: string;
+  onChange: (value: string) => void;
+  placeholder?: string;
+  className?: string;
+}
+
+export const SearchSuggestInput = ({ id, value, onChange, placeholder, className }: SearchSuggestInputProps) => {
+  const navigate = useNavigate();
+  const [open, setOpen] = useState(false);
+  const [highlighted, setHighlighted] = useState(-1);
+  const suggestions = useSearchSuggestions(open ? value : "");
+
+  const select = (index: number) => {
+    const suggestion = suggestions[index];
+    if (!suggestion) return;
+    setOpen(false);
+    if (suggestion.kind === "listing" && suggestion.slug) {
+      navigate(`/business/${suggestion.slug}`);
+      return;
+    }
+    onChange(suggestion.text);
+  };
+
+  const handleKeyDown = (event: React.KeyboardEvent<HTMLInputElement>) => {
+    if (!open || suggestions.length === 0) return;
+    if (event.key === "ArrowDown") {
+      event.preventDefault();
+      setHighlighted((current) => (current + 1) % suggestions.length);
+    } else if (event.key === "ArrowUp") {
+      event.preventDefault();
+      setHighlighted((current) => (current <= 0 ? suggestions.length - 1 : current - 1));
+    } else if (event.key === "Enter" && highlighted >= 0) {
+      event.preventDefault();
+      select(highlighted);
+    } else if (event.key === "Escape") {
+      setOpen(false);
+    }
+  };
+
+  return (
+    <div className="relative w-full">
+      <Input
+        id={id}
+        value={value}
+        autoComplete="off"
+        onChange={(event) => {
+          onChange(event.target.value);
+          setOpen(true);
+          setHighlighted(-1);
+        }}
+        onFocus={() => setOpen(true)}
+        onBlur={() => setOpen(false)}
+        onKeyDown={handleKeyDown}
+        placeholder={placeholder}
+        className={className}
+      />
+      {open && suggestions.length > 0 && (
+        <ul className="absolute z-30 mt-1 w-full overflow-hidden rounded-md border bg-popover text-popover-foreground shadow-md">
+          {suggestions.map((suggestion, index) => (
+            <li key={`${suggestion.kind}:${suggestion.text}`}>
+              <button
+                type="button"
+                onMouseDown={(event) => {
+                  event.preventDefault();
+                  select(index);
+                }}
+                className={cn(
+                  "flex w-full items-center justify-between gap-2 px-2.5 py-1.5 text-left text-sm hover:bg-accent",
+                  index === highlighted && "bg-accent",
+                )}
+              >
+                <span className="truncate">{suggestion.text}</span>
+                <span className="shrink-0 text-xs text-muted-foreground">{KIND_LABELS[suggestion.kind]}</span>
+              </button>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+};
@@ -1,5 +1,11 @@
 import { useQuery } from "@tanstack/react-query";
-import { fetchListingBySlug, fetchListings, type Listing, type ListingFilters } from "@/lib/api";
+import {
+  fetchListingBySlug,
+  fetchListings,
+  readInlinedPageData,
+  type Listing,
+  type ListingFilters,
+} from "@/lib/api";
 
 const buildQueryKey = (filters?: ListingFilters) => {
   if (!filters) {
@@ -13,10 +19,31 @@ const buildQueryKey = (filters?: ListingFilters) => {
   ] as const;
 };
 
+// Seed queries from a pre-rendered page, then refetch in the background since
+// the inlined copy is only as fresh as the last build.
+const inlinedListings = (filters?: ListingFilters) => {
+  const page = readInlinedPageData();
+  if (!page?.category || !page.listings || !filters) return undefined;
+  const categories = filters.categories ?? [];
+  const matches =
+    categories.length === 1 &&
+    categories[0].toLowerCase() === page.category.toLowerCase() &&
+    !filters.locations?.length &&
+    !filters.search?.trim();
+  return matches ? page.listings : undefined;
+};
+
+const inlinedListing = (slug?: string) => {
+  const listing = readInlinedPageData()?.listing;
+  return slug && listing?.slug === slug ? listing : undefined;
+};
+
 export const useListings = (filters?: ListingFilters, options?: { enabled?: boolean }) =>
   useQuery<Listing[], Error>({
     queryKey: buildQueryKey(filters),
     queryFn: () => fetchListings(filters),
+    initialData: () => inlinedListings(filters),
+    initialDataUpdatedAt: 0,
     staleTime: 1000 * 60 * 10,
     enabled: options?.enabled ?? true,
   });
@@ -26,5 +53,7 @@ export const useListing = (slug?: string) =>
     queryKey: ["listing", slug],
     queryFn: () => fetchListingBySlug(slug as string),
     enabled: Boolean(slug),
+    initialData: () => inlinedListing(slug),
+    initialDataUpdatedAt: 0,
     staleTime: 1000 * 60 * 5,
   });
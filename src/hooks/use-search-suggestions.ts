@@ -0,0 +1,16 @@
+import { useMemo } from "react";
+import { useQuery } from "@tanstack/react-query";
+import { fetchSearchIndex } from "@/lib/api";
+import { suggest, type SearchIndex, type Suggestion } from "@/lib/search-index";
+
+export const useSearchIndex = () =>
+  useQuery<SearchIndex, Error>({
+    queryKey: ["search-index"],
+    queryFn: fetchSearchIndex,
+    staleTime: Infinity,
+  });
+
+export const useSearchSuggestions = (query: string, limit = 8): Suggestion[] => {
+  const { data: index } = useSearchIndex();
+  return useMemo(() => (index ? suggest(index, query, limit) : []), [index, query, limit]);
+};
@@ -1,3 +1,5 @@
+import type { SearchIndex } from './search-index';
+
 export interface Listing {
   id: string;
   slug: string;
@@ -24,6 +26,205 @@ export interface ListingFilters {
   search?: string;
 }
 
+interface DataPatchPointer {
+  from: string;
+  to: string;
+  url: string;
+  bytes: number;
+}
+
+interface DataPointer {
+  url: string;
+  sha256: string;
+  bytes: number;
+  patches?: DataPatchPointer[];
+}
+
+// Written by scripts/listing_patches.py; see applyListingsPatch.
+interface ListingsPatch {
+  key: string;
+  from: string;
+  to: string;
+  removed: string[];
+  changed: [string, Listing][];
+  added: [number, string, Listing][];
+  order?: string[];
+}
+
+interface ListingsSnapshot {
+  version: string;
+  listings: Listing[];
+}
+
+let dataManifestPromise: Promise<Record<string, DataPointer> | null> | null = null;
+let listingsSnapshot: ListingsSnapshot | null = null;
+
+// The last listings.json generation is kept in Cache Storage so a returning
+// visitor can catch up with patches; the version travels in a header.
+const SNAPSHOT_CACHE = 'listings-snapshot';
+const SNAPSHOT_KEY = '/data/listings.snapshot.json';
+const SNAPSHOT_VERSION_HEADER = 'X-Listings-Version';
+
+function loadDataManifest(refresh = false): Promise<Record<string, DataPointer> | null> {
+  if (!dataManifestPromise || refresh) {
+    dataManifestPromise = fetch('/data/manifest.json', { cache: 'no-cache' })
+      .then((response) => (response.ok ? (response.json() as Promise<Record<string, DataPointer>>) : null))
+      .catch(() => null);
+  }
+  return dataManifestPromise;
+}
+
+// Prefer the immutable content-hashed copy published by build_listings_json.py,
+// falling back to the fixed-name file when no pointer manifest exists.
+async function resolveDataUrl(fileName: string): Promise<string> {
+  const manifest = await loadDataManifest();
+  return manifest?.[fileName]?.url ?? `/data/${fileName}`;
+}
+
+export interface InlinedPageData {
+  listing?: Listing;
+  category?: string;
+  // Card fields only (see listing_card in static_pages.py): no url or remote
+  // image, three tags, a summarized description and the first phone number.
+  listings?: Listing[];
+}
+
+let inlinedPageData: InlinedPageData | null | undefined;
+
+// Pages pre-rendered by scripts/static_pages.py embed their data in
+// <script id="page-data"> so the first render needs no request.
+export function readInlinedPageData(): InlinedPageData | null {
+  if (inlinedPageData === undefined) {
+    const element = typeof document !== 'undefined' ? document.getElementById('page-data') : null;
+    try {
+      inlinedPageData = element?.textContent ? (JSON.parse(element.textContent) as InlinedPageData) : null;
+    } catch {
+      inlinedPageData = null;
+    }
+  }
+  return inlinedPageData;
+}
+
+// Same keys as record_keys() in scripts/listing_patches.py: repeated ids get #1, #2...
+function recordKeys(listings: Listing[], field: string): string[] {
+  const seen = new Map<string, number>();
+  return listings.map((listing) => {
+    const value = String((listing as unknown as Record<string, unknown>)[field] ?? '');
+    const count = seen.get(value) ?? 0;
+    seen.set(value, count + 1);
+    return count ? `${value}#${count}` : value;
+  });
+}
+
+export function applyListingsPatch(listings: Listing[], patch: ListingsPatch): Listing[] {
+  const removed = new Set(patch.removed);
+  const changed = new Map(patch.changed);
+  const keys = recordKeys(listings, patch.key);
+  const kept: [string, Listing][] = [];
+  listings.forEach((listing, index) => {
+    if (!removed.has(keys[index])) {
+      kept.push([keys[index], changed.get(keys[index]) ?? listing]);
+    }
+  });
+  if (patch.order) {
+    const byKey = new Map(kept);
+    patch.added.forEach(([, key, listing]) => byKey.set(key, listing));
+    return patch.order.map((key) => byKey.get(key) as Listing);
+  }
+  const result = kept.map(([, listing]) => listing);
+  patch.added.forEach(([index, , listing]) => result.splice(index, 0, listing));
+  return result;
+}
+
+// Patches leading from `version` to the pointer's current version, or null when
+// the chain is broken or would cost more than downloading the file again.
+function planPatches(pointer: DataPointer, version: string): DataPatchPointer[] | null {
+  const byFrom = new Map<string, DataPatchPointer>();
+  // Newest first in the manifest; let the newest patch win for a repeated version.
+  [...(pointer.patches ?? [])].reverse().forEach((patch) => byFrom.set(patch.from, patch));
+  const target = pointer.sha256.slice(0, 16);
+  const chain: DataPatchPointer[] = [];
+  let bytes = 0;
+  while (version !== target) {
+    const next = byFrom.get(version);
+    if (!next || chain.length >= byFrom.size) {
+      return null;
+    }
+    chain.push(next);
+    bytes += next.bytes;
+    version = next.to;
+  }
+  return bytes < pointer.bytes ? chain : null;
+}
+
+async function readListingsSnapshot(): Promise<ListingsSnapshot | null> {
+  if (listingsSnapshot || typeof caches === 'undefined') {
+    return listingsSnapshot;
+  }
+  try {
+    const response = await (await caches.open(SNAPSHOT_CACHE)).match(SNAPSHOT_KEY);
+    const version = response?.headers.get(SNAPSHOT_VERSION_HEADER);
+    if (response && version) {
+      listingsSnapshot = { version, listings: (await response.json()) as Listing[] };
+    }
+  } catch {
+    // Storage unavailable (e.g. private mode); start without a snapshot.
+  }
+  return listingsSnapshot;
+}
+
+function saveListingsSnapshot(snapshot: ListingsSnapshot): void {
+  listingsSnapshot = snapshot;
+  if (typeof caches === 'undefined') {
+    return;
+  }
+  const response = new Response(JSON.stringify(snapshot.listings), {
+    headers: { 'Content-Type': 'application/json', [SNAPSHOT_VERSION_HEADER]: snapshot.version },
+  });
+  caches
+    .open(SNAPSHOT_CACHE)
+    .then((cache) => cache.put(SNAPSHOT_KEY, response))
+    .catch(() => undefined);
+}
+
+// Catch up from the stored listings.json generation with patches when the
+// build has published a newer one, or download the current file.
+async function fetchBaseListings(pointer: DataPointer | undefined): Promise<Listing[]> {
+  if (!pointer) {
+    return handleResponse<Listing[]>(await fetch('/data/listings.json'));
+  }
+  const version = pointer.sha256.slice(0, 16);
+  const snapshot = await readListingsSnapshot();
+  if (snapshot?.version === version) {
+    return snapshot.listings;
+  }
+  const chain = snapshot ? planPatches(pointer, snapshot.version) : null;
+  if (snapshot && chain) {
+    try {
+      let listings = snapshot.listings;
+      for (const step of chain) {
+        listings = applyListingsPatch(listings, await handleResponse<ListingsPatch>(await fetch(step.url)));
+      }
+      saveListingsSnapshot({ version, listings });
+      return listings;
+    } catch {
+      // Fall back to the full file below.
+    }
+  }
+  const listings = await handleResponse<Listing[]>(await fetch(pointer.url));
+  saveListingsSnapshot({ version, listings });
+  return listings;
+}
+
+// Everything /api/listings serves, assembled from the published data files.
+async function fetchPublishedListings(manifest: Record<string, DataPointer> | null): Promise<Listing[]> {
+  const all = await fetchBaseListings(manifest?.['listings.json']);
+  const custom = await fetchCustomListingsFallback();
+  const combined = [...all, ...(custom ?? [])];
+  const claims = await fetchClaimsFallback();
+  return claims ? mergeClaims(combined, claims) : combined;
+}
+
 async function handleResponse<T>(response: Response): Promise<T> {
   if (!response.ok) {
     const message = await response.text();
@@ -94,16 +295,17 @@ export async function fetchListings(filters?: ListingFilters): Promise<Listing[]
     const response = await fetch(`/api/listings${query}`);
     return await handleResponse<Listing[]>(response);
   } catch (error) {
-    const fallback = await fetch('/data/listings.json');
-    const all = await handleResponse<Listing[]>(fallback);
-    const custom = await fetchCustomListingsFallback();
-    const combined = [...all, ...(custom ?? [])];
-    const claims = await fetchClaimsFallback();
-    const merged = claims ? mergeClaims(combined, claims) : combined;
-    return applyFilters(merged, filters);
+    // The API carries the live claims and custom listings; the published files
+    // (and the stored snapshot plus patches) are only the offline copy.
+    return applyFilters(await fetchPublishedListings(await loadDataManifest(true)), filters);
   }
 }
 
+export async function fetchSearchIndex(): Promise<SearchIndex> {
+  const response = await fetch(await resolveDataUrl('search-index.json'));
+  return handleResponse<SearchIndex>(response);
+}
+
 export async function fetchListingBySlug(slug: string): Promise<Listing> {
   try {
     const response = await fetch(`/api/listings?slug=${encodeURIComponent(slug)}`);
@@ -120,7 +322,7 @@ export async function fetchListingBySlug(slug: string): Promise<Listing> {
 
 async function fetchClaimsFallback(): Promise<Record<string, ListingClaim> | null> {
   try {
-    const response = await fetch('/data/listing-claims.json');
+    const response = await fetch(await resolveDataUrl('listing-claims.json'));
     if (!response.ok) {
       return null;
     }
@@ -132,7 +334,7 @@ async function fetchClaimsFallback(): Promise<Record<string, ListingClaim> | nul
 
 async function fetchCustomListingsFallback(): Promise<Listing[] | null> {
   try {
-    const response = await fetch('/data/custom-listings.json');
+    const response = await fetch(await resolveDataUrl('custom-listings.json'));
     if (!response.ok) {
       return null;
     }
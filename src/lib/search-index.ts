@@ -0,0 +1,174 @@
+// Typo-tolerant autocomplete over the index emitted by scripts/search_index.py.
+// normalize/trigrams/scoring must stay in step with the Python builder.
+
+export type SuggestionKind = 'listing' | 'tag' | 'location';
+
+export interface SearchIndex {
+  version: number;
+  terms: [string, SuggestionKind, number, string | null][];
+  words: string[];
+  postings: number[][];
+  trigrams: Record<string, number[]>;
+}
+
+export interface Suggestion {
+  text: string;
+  kind: SuggestionKind;
+  slug: string | null;
+  score: number;
+}
+
+const AUXILIARY_PENALTY = 0.25;
+const EXTENSION_PENALTY = 0.1;
+// Single characters match too much of the index to be worth completing.
+const MIN_QUERY_LENGTH = 2;
+
+export function normalize(text: string): string {
+  return text
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .replace(/&/g, ' and ')
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim();
+}
+
+function trigrams(word: string): Set<string> {
+  const padded = `^${word}`;
+  const grams = new Set<string>();
+  for (let index = 0; index < padded.length - 2; index += 1) {
+    grams.add(padded.slice(index, index + 3));
+  }
+  return grams;
+}
+
+function maxEdits(token: string): number {
+  if (token.length <= 2) return 0;
+  if (token.length <= 5) return 1;
+  return 2;
+}
+
+function lowerBound(words: string[], target: string): number {
+  let low = 0;
+  let high = words.length;
+  while (low < high) {
+    const middle = (low + high) >>> 1;
+    if (words[middle] < target) {
+      low = middle + 1;
+    } else {
+      high = middle;
+    }
+  }
+  return low;
+}
+
+function boundedDistance(token: string, word: string, limit: number, prefix: boolean): number | null {
+  if (!prefix && Math.abs(token.length - word.length) > limit) {
+    return null;
+  }
+  const columns = prefix ? Math.min(word.length, token.length + limit) : word.length;
+  let previous = Array.from({ length: columns + 1 }, (_, column) => column);
+  for (let row = 1; row <= token.length; row += 1) {
+    const current = [row];
+    let rowMin = row;
+    for (let column = 1; column <= columns; column += 1) {
+      const cost = token[row - 1] === word[column - 1] ? 0 : 1;
+      const value = Math.min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + cost);
+      current.push(value);
+      rowMin = Math.min(rowMin, value);
+    }
+    if (rowMin > limit) {
+      return null;
+    }
+    previous = current;
+  }
+  const distance = prefix ? Math.min(...previous) : previous[columns];
+  return distance <= limit ? distance : null;
+}
+
+function matchToken(index: SearchIndex, token: string, prefix: boolean): Map<number, number> {
+  const limit = maxEdits(token);
+  const candidates: number[] = [];
+  if (limit === 0) {
+    const start = lowerBound(index.words, token);
+    for (let wordIndex = start; wordIndex < index.words.length; wordIndex += 1) {
+      const word = index.words[wordIndex];
+      if (prefix ? !word.startsWith(token) : word !== token) break;
+      candidates.push(wordIndex);
+    }
+  } else {
+    const grams = trigrams(token);
+    const hits = new Map<number, number>();
+    grams.forEach((gram) => {
+      index.trigrams[gram]?.forEach((wordIndex) => hits.set(wordIndex, (hits.get(wordIndex) ?? 0) + 1));
+    });
+    const required = Math.max(1, grams.size - 3 * limit);
+    hits.forEach((count, wordIndex) => {
+      if (count >= required) candidates.push(wordIndex);
+    });
+  }
+
+  const matches = new Map<number, number>();
+  candidates.forEach((wordIndex) => {
+    const word = index.words[wordIndex];
+    const distance = limit === 0 ? 0 : boundedDistance(token, word, limit, prefix);
+    if (distance !== null) {
+      matches.set(wordIndex, distance + (word !== token ? EXTENSION_PENALTY : 0));
+    }
+  });
+  return matches;
+}
+
+export function suggest(index: SearchIndex, query: string, limit = 8): Suggestion[] {
+  const normalized = normalize(query);
+  if (normalized.length < MIN_QUERY_LENGTH) {
+    return [];
+  }
+  const tokens = normalized.split(' ');
+  const completing = !/\s$/.test(query);
+
+  let costs: Map<number, number> | null = null;
+  for (let position = 0; position < tokens.length; position += 1) {
+    const prefix = completing && position === tokens.length - 1;
+    const tokenCosts = new Map<number, number>();
+    matchToken(index, tokens[position], prefix).forEach((wordCost, wordIndex) => {
+      index.postings[wordIndex].forEach((posting) => {
+        const termIndex = posting >= 0 ? posting : -posting - 1;
+        const cost = posting >= 0 ? wordCost : wordCost + AUXILIARY_PENALTY;
+        const existing = tokenCosts.get(termIndex);
+        if (existing === undefined || cost < existing) {
+          tokenCosts.set(termIndex, cost);
+        }
+      });
+    });
+    if (costs === null) {
+      costs = tokenCosts;
+    } else {
+      const next = new Map<number, number>();
+      costs.forEach((cost, termIndex) => {
+        const tokenCost = tokenCosts.get(termIndex);
+        if (tokenCost !== undefined) next.set(termIndex, cost + tokenCost);
+      });
+      costs = next;
+    }
+    if (!costs.size) {
+      return [];
+    }
+  }
+
+  const ranked = Array.from(costs.entries())
+    .map(([termIndex, cost]) => ({ term: index.terms[termIndex], score: index.terms[termIndex][2] / (1 + cost) }))
+    .sort((a, b) => b.score - a.score || (a.term[0] < b.term[0] ? -1 : a.term[0] > b.term[0] ? 1 : 0));
+
+  const results: Suggestion[] = [];
+  const seen = new Set<string>();
+  for (const { term, score } of ranked) {
+    const [text, kind, , slug] = term;
+    const key = `${kind}:${text}`;
+    if (seen.has(key)) continue;
+    seen.add(key);
+    results.push({ text, kind, slug, score });
+    if (results.length >= limit) break;
+  }
+  return results;
+}
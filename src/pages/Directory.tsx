@@ -3,14 +3,15 @@ import { FilterSidebar, type FilterState } from "@/components/FilterSidebar";
 import { DirectoryMap } from "@/components/DirectoryMap";
 import { DirectoryListItem } from "@/components/DirectoryListItem";
 import { BusinessCard } from "@/components/BusinessCard";
+import { SearchSuggestInput } from "@/components/SearchSuggestInput";
 import { Button } from "@/components/ui/button";
-import { Input } from "@/components/ui/input";
 import { ChevronDown, SlidersHorizontal, X } from "lucide-react";
 import { useListings } from "@/hooks/use-listings";
+import { readInlinedPageData } from "@/lib/api";
 import { useBumpLeaderboard } from "@/hooks/use-bumps";
 import { useLayoutPreference } from "@/contexts/layout-preference";
 import { useMemo, useState, useEffect } from "react";
-import { useSearchParams } from "react-router-dom";
+import { useParams, useSearchParams } from "react-router-dom";
 
 const DEFAULT_CATEGORY = "Food & Beverage";
 
@@ -37,10 +38,21 @@ const parseFiltersFromParams = (params: URLSearchParams) => {
   } as Pick<FilterState, "categories" | "locations" | "search">;
 };
 
+// Same rule as slugify() in scripts/build_listings_json.py, used for /directory/:categorySlug.
+const toCategorySlug = (value: string) =>
+  value
+    .toLowerCase()
+    .trim()
+    .replace(/&/g, "and")
+    .replace(/[^a-z0-9]+/g, "-")
+    .replace(/^-+|-+$/g, "");
+
 const normalizeValues = (values: string[], options: string[]) => {
   if (!values.length || !options.length) return values;
   return values.map((value) => {
-    const match = options.find((option) => option.toLowerCase() === value.toLowerCase());
+    const match = options.find(
+      (option) => option.toLowerCase() === value.toLowerCase() || toCategorySlug(option) === value
+    );
     return match ?? value;
   });
 };
@@ -59,8 +71,16 @@ const withRequiredCategory = (state: FilterState): FilterState => ({
 
 const Directory = () => {
   const [searchParams] = useSearchParams();
+  const { categorySlug } = useParams<{ categorySlug?: string }>();
   const { viewMode } = useLayoutPreference();
-  const initialFiltersFromQuery = parseFiltersFromParams(searchParams);
+  // Category pages pre-rendered by the build carry the display name; otherwise
+  // the slug is resolved against the loaded categories by normalizeValues.
+  const routeCategory = categorySlug ? readInlinedPageData()?.category ?? categorySlug : undefined;
+  const deriveFilters = (params: URLSearchParams) => {
+    const parsed = parseFiltersFromParams(params);
+    return routeCategory && !parsed.categories.length ? { ...parsed, categories: [routeCategory] } : parsed;
+  };
+  const initialFiltersFromQuery = deriveFilters(searchParams);
   const [filters, setFiltersState] = useState<FilterState>(() =>
     withRequiredCategory({
       ...defaultFilterState,
@@ -155,7 +175,7 @@ const Directory = () => {
   }, [baseQuery.data, listingData]);
 
   useEffect(() => {
-    const derived = parseFiltersFromParams(searchParams);
+    const derived = deriveFilters(searchParams);
     setFilters((prev) => {
       if (
         arraysEqual(prev.categories, derived.categories) &&
@@ -166,7 +186,7 @@ const Directory = () => {
       }
       return { ...prev, ...derived };
     });
-  }, [searchParams]);
+  }, [searchParams, routeCategory]);
 
   useEffect(() => {
     if (!availableCategories.length && !availableLocations.length) return;
@@ -441,10 +461,10 @@ const ExplorerFilterBar = ({ filters, categories, locations, onApply }: Explorer
         <label className="text-xs font-semibold text-muted-foreground" htmlFor="explorer-search">
           Search
         </label>
-        <Input
+        <SearchSuggestInput
           id="explorer-search"
           value={searchValue}
-          onChange={(event) => setSearchValue(event.target.value)}
+          onChange={setSearchValue}
           placeholder="Search by name, tag, or description"
           className="h-9 px-2.5"
         />